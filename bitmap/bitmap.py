@@ -4,100 +4,66 @@ Shared helper functions
 from shared import shared
 from shared.shared import _diamondSizes, _diamondVectors
 from vector import vector
-import random
+import collections
+import numpy as np
+import os
+import pathlib
 
 
 # Set of pattern functions
+def _rgbArray(colour):
+    """Colour as validated by Pixel, as a uint8 array ready to broadcast into a pixel buffer."""
+    return np.array(Pixel(colour).rgb, dtype=np.uint8)
+
+
 def _patternBlank(dims, colour=None):
     x, y = dims
     if colour is None:
         colour = 255  # default = white
-    return [[Pixel(colour) for j in range(x)] for i in range(y)]
+    return np.full((y, x, 3), _rgbArray(colour), dtype=np.uint8)
 
 
 def _patternCheckerboard(dims, checksize, colour1=0, colour2=255):
-    pixels = []
     x, y = dims
-    for j in range(y):
-        pixels.append([])
-        for i in range(x):
-            if ((i % (2 * checksize)) >= checksize) ^ ((j % (2 * checksize)) >= checksize):
-                pixels[-1].append(Pixel(colour1))
-            else:
-                pixels[-1].append(Pixel(colour2))
-    return pixels
+    ys, xs = np.indices((y, x))
+    checks = ((xs % (2 * checksize)) >= checksize) ^ ((ys % (2 * checksize)) >= checksize)
+    return np.where(checks[..., np.newaxis], _rgbArray(colour1), _rgbArray(colour2))
 
 
 def _patternDiamonds(dims, angles=None, sizes=None, colour1=(0, 0, 0), colour2=(255, 255, 255)):
-    pixels = []
     vUnitH, vUnitV = shared._diamondVectors(angles)
     sizeH, sizeV = shared._diamondSizes(sizes)
     vOrigin = vector.Vector(vector.radialIntersection(dims, vUnitH.phaseAngle()))
 
-    x, y = dims
-    for n in range(y):
-        pixels.append([])
-        for m in range(x):
-            vPosition = vector.Vector2D([m, n]) - vOrigin
-
-            distanceAlongHorizontal = vector.dotProduct(vPosition, vUnitH)
-            distanceAlongVertical = vector.dotProduct(vPosition, vUnitV)
-            distThroughPatternHorizontal = distanceAlongHorizontal % (2 * sizeH)
-            distThroughPatternVertical = distanceAlongVertical % (2 * sizeV)
-
-            if (distThroughPatternHorizontal < sizeH) ^ (distThroughPatternVertical >= sizeV):
-                baseColour = colour1
-                mixColour = colour2
-            else:
-                baseColour = colour2
-                mixColour = colour1
-
-            mixRateH = [1]
-            if distThroughPatternHorizontal < 1:
-                mixRateH = [1 - distThroughPatternHorizontal, distThroughPatternHorizontal]
-            elif sizeH < distThroughPatternHorizontal < sizeH + 1:
-                distIntoNextColour = distThroughPatternHorizontal - sizeH
-                mixRateH = [1 - distIntoNextColour, distIntoNextColour]
-
-            mixRateV = [1]
-            if distThroughPatternVertical < 1:
-                mixRateV = [1 - distThroughPatternVertical, distThroughPatternVertical]
-            elif sizeV < distThroughPatternVertical < sizeV + 1:
-                distIntoNextColour = distThroughPatternVertical - sizeV
-                mixRateV = [1 - distIntoNextColour, distIntoNextColour]
-
-            # First implementation : Mix proportions as if diamonds are square: this might make points ill-defined!
-            # Probably should add some kind of cos theta element.
-            proportions = [pH * pV for pH in mixRateH for pV in mixRateV]
-
-            # print("{} = {}".format(proportions, sum(proportions)))
-            if len(proportions) == 1:
-                c = baseColour
-            if len(proportions) == 2:
-                c = _rgbBlend(baseColour, mixColour, proportions[0])
-            if len(proportions) == 4:
-                c = _rgbBlend(baseColour, mixColour, proportions[0] + proportions[3])
-            pixels[-1].append(Pixel(c))
-    return pixels
+    distanceH = shared.distanceAlong(dims, vOrigin, vUnitH)
+    distanceV = shared.distanceAlong(dims, vOrigin, vUnitV)
+    # First implementation : Mix proportions as if diamonds are square: this might make points ill-defined!
+    # Probably should add some kind of cos theta element.
+    baseIsFirst, proportions = shared._diamondMixRates(distanceH, distanceV, sizeH, sizeV)
+
+    rgb1 = _rgbArray(colour1)
+    rgb2 = _rgbArray(colour2)
+    baseColours = np.where(baseIsFirst[..., np.newaxis], rgb1, rgb2)
+    mixColours = np.where(baseIsFirst[..., np.newaxis], rgb2, rgb1)
+    return shared.rgbBlendArray(baseColours, mixColours, proportions)
 
 
 def _patternDiamonds2(dims, angles=(0, 90), sizes=(7, 7), colour1=(0, 0, 0), colour2=(255, 255, 255)):
-    p = Pixel(1)
-    stripeDensities = [[p.rgb[0] for row in _patternStripe(dims, stripewidth=sizes[i], angle=angles[i],
-                                                           colour1=(0, 0, 0), colour2=(255, 255, 255))
-                        for p in row] for i in range(2)]
+    """Exclusive or of two stripe patterns, taken directly from their density planes."""
+    densities = [1 - _stripePlane(dims, stripewidth=sizes[i], angle=angles[i]) for i in range(2)]
+    return shared.rgbBlendArray(_rgbArray(colour1), _rgbArray(colour2), np.abs(densities[0] - densities[1]))
 
-    pixels = [Pixel(_rgbBlend(colour1, colour2, abs(a - b) / 255)) for a, b in zip(*stripeDensities)]
 
-    rows = []
-    while pixels:
-        row = pixels[:dims[0]]
-        rows.append(row)
-        pixels = pixels[dims[0]:]
-    return rows
+def _patternGaussian(dims, colour=(0, 0, 0), mus=None, sigmas=None, delta=1, terminal=255, rng=None):
+    """
+    Random walk of colour: each draw adds delta to one channel (cycling through RGB) of the pixel at a gaussian
+    coordinate.  The walk stops at the end of the RGB cycle in which any channel first lies beyond the terminal.
 
+    Draws are taken in blocks and accumulated per channel; the stopping point is located exactly within the block, so
+    the result is as if the draws had been taken one at a time.
 
-def _patternGaussian(dims, colour=(0, 0, 0), mus=None, sigmas=None, delta=1, terminal=255):
+    :param rng: numpy Generator, random.Random or seed, None for the random module, see shared.numpyRandom
+    """
     xmax, ymax = dims
     if mus:
         xmu, ymu = mus
@@ -112,75 +78,69 @@ def _patternGaussian(dims, colour=(0, 0, 0), mus=None, sigmas=None, delta=1, ter
         ysigma = ymax / 4
 
     terminal = shared.clipValue(terminal)
-
-    pixelColours = [[list(Pixel(colour).rgb) for j in range(xmax)] for i in range(ymax)]
-
-    terminalReached = not delta  # if delta == 0, don't start the loop
-    colourIndex = 0
-    while not terminalReached or colourIndex:
-        # for i in range(9000000):
-        x = round(random.gauss(xmu, xsigma))
-        y = round(random.gauss(ymu, ysigma))
-        if 0 <= x < xmax and 0 <= y < ymax:
-            newValue = shared.clipValue(pixelColours[y][x][colourIndex] + delta)
-            pixelColours[y][x][colourIndex] = newValue
-            # if (delta > 0 and channel >= terminal) or (delta < 0 and channel <= terminal):
-            if (terminal - newValue) * delta <= 0:  # newValue lies beyond the terminal
-                # print("Terminal reached, iteration({})".format(i))
+    start = np.array(Pixel(colour).rgb, dtype=np.int64)
+    counts = np.zeros(xmax * ymax * 3, dtype=np.int64)  # Draws per channel, keyed by pixel index * 3 + channel
+
+    if delta:  # if delta == 0, don't start the walk
+        thresholds = []  # Draws needed for each channel to lie beyond the terminal
+        for value in start:
+            hits = 1
+            while (terminal - shared.clipValue(value + hits * delta)) * delta > 0:
+                hits += 1
+            thresholds.append(hits)
+        keyThresholds = np.tile(thresholds, xmax * ymax)
+
+        rng = shared.numpyRandom(rng)
+        blockSize = 3 * shared._gaussianBlockSize(min(thresholds), (xsigma, ysigma))  # Every block starts on red
+        channels = np.arange(blockSize) % 3
+
+        terminalReached = False
+        while not terminalReached:
+            indices, inside = shared._gaussianCoordinates(rng, blockSize, (xmu, ymu), (xsigma, ysigma), dims)
+            iterations = np.flatnonzero(inside)
+            keys = indices[iterations] * 3 + channels[iterations]
+            crossing = shared._firstThresholdCrossing(counts, keys, keyThresholds)
+            if crossing is not None:
+                lastIteration = iterations[crossing] // 3 * 3 + 2  # Complete the RGB cycle
+                keys = keys[:np.searchsorted(iterations, lastIteration, side='right')]
                 terminalReached = True
-        colourIndex = (colourIndex + 1) % 3  # cycle through RGB
+            counts += np.bincount(keys, minlength=counts.size)
 
-    return [[Pixel(colour) for colour in row] for row in pixelColours]
+    values = start + counts.reshape(ymax, xmax, 3) * delta
+    return np.clip(values, 0, 255).astype(np.uint8)
 
 
 def _patternGradient(dims, angle=45, colour1=0, colour2=255):
-    pixels = []
     vUnit = vector.Vector2D.unit(angle)
     vOrigin = vector.Vector(vector.radialIntersection(dims, angle - 180))
     vTerminus = vector.Vector(vector.radialIntersection(dims, angle))
     distanceTotal = (vTerminus - vOrigin).magnitude()
 
-    x, y = dims
-    for n in range(y):
-        pixels.append([])
-        for m in range(x):
-            vPosition = vector.Vector2D([m, n]) - vOrigin
-            distanceAlongDirection = vector.dotProduct(vPosition, vUnit)
-            colour = _rgbBlend(colour1, colour2, distanceAlongDirection / distanceTotal)
-            pixels[-1].append(Pixel(colour))
-    return pixels
+    distances = shared.distanceAlong(dims, vOrigin, vUnit)
+    return shared.rgbBlendArray(_rgbArray(colour1), _rgbArray(colour2), distances / distanceTotal)
 
 
 def _patternStripe(dims, stripewidth, angle=45, colour1=0, colour2=255, interpolated=True):
-    pixels = []
+    proportions = _stripePlane(dims, stripewidth, angle, interpolated)
+    return shared.rgbBlendArray(_rgbArray(colour2), _rgbArray(colour1), proportions)
+
+
+def _stripePlane(dims, stripewidth, angle=45, interpolated=True):
+    """
+    Stripe pattern as a float plane: the proportion of the first stripe colour at each pixel.
+    """
     vUnit = vector.Vector2D.unit(angle)
     vOrigin = vector.Vector(vector.radialIntersection(dims, angle - 180))
     # print("{}: {}".format(vUnit, vOrigin))
 
-    x, y = dims
-    for n in range(y):
-        pixels.append([])
-        for m in range(x):
-            vPosition = vector.Vector2D([m, n]) - vOrigin
-            distanceAlongDirection = vector.dotProduct(vPosition, vUnit)
-            distancethroughPattern = distanceAlongDirection % (2 * stripewidth)
-            if interpolated and distancethroughPattern < 1:
-                c = _rgbBlend(colour2, colour1, distancethroughPattern)
-            elif interpolated and stripewidth - 1 < distancethroughPattern < stripewidth:
-                c = _rgbBlend(colour2, colour1, stripewidth - distancethroughPattern)
-            elif distancethroughPattern >= stripewidth:
-                c = colour2
-            else:
-                c = colour1
-            pixels[-1].append(Pixel(c))
-    return pixels
+    distances = shared.distanceAlong(dims, vOrigin, vUnit)
+    return shared._stripeProportions(distances, stripewidth, interpolated)
 
 
 def _patternStripeHorizontal(dims, stripewidth, colour1=(0, 0, 0), colour2=(255, 255, 255)):
     xmax, ymax = dims
-    pixels = []
+    rowColours = []
     for n in range(ymax):
-        pixels.append([])
         distancethroughPattern = n % (stripewidth * 2)
         if distancethroughPattern < 1:
             c = _rgbBlend(colour1, colour2, distancethroughPattern)
@@ -190,15 +150,14 @@ def _patternStripeHorizontal(dims, stripewidth, colour1=(0, 0, 0), colour2=(255,
             c = colour2
         else:
             c = colour1
-        print("row: {}, colour:{}".format(n, c))
-        for m in range(xmax):
-            pixels[-1].append(Pixel(c))
-    return pixels
+        rowColours.append(Pixel(c).rgb)
+    return np.repeat(np.array(rowColours, dtype=np.uint8)[:, np.newaxis, :], xmax, axis=1)
 
 
 def _patternStripeVertical(dims, stripewidth, colour1=(0, 0, 0), colour2=(255, 255, 255)):
     xmax, ymax = dims
-    return list(zip(*_patternStripeHorizontal((ymax, xmax), stripewidth, colour1=colour1, colour2=colour2)))
+    return np.ascontiguousarray(
+        _patternStripeHorizontal((ymax, xmax), stripewidth, colour1=colour1, colour2=colour2).transpose(1, 0, 2))
 
 
 def _rgbBlend(c1, c2, proportion):
@@ -238,49 +197,98 @@ class Bitmap:
     def __init__(self, dims, pixels=None, fillFunc=None, fillParameters=None):
         """
         :param dims: tuple of (x, y) dimensions in pixels.
-        :param pixels: list of pixels, None for self-generated.
+        :param pixels: (y, x, 3) uint8 array or 2D iterable of Pixels, None for self-generated.  Arrays are used as the
+                       pixel buffer without copying.
         :param fillFunc: selected function to generate fill pattern.
         :param fillParameters: parameters for the fill function.
         """
-        if pixels:
-            if type(pixels[0][0]) is Pixel:
-                self.pixels = pixels
+        if pixels is not None and len(pixels):
+            if isinstance(pixels, np.ndarray) and pixels.ndim == 3 and pixels.shape[2] == 3:
+                self.array = pixels if pixels.dtype == np.uint8 else pixels.astype(np.uint8)
+            elif type(pixels[0][0]) is Pixel:
+                self.array = np.array([[p.rgb for p in row] for row in pixels], dtype=np.uint8)
             else:
-                raise ValueError("pixels parameter requires 2D iterable of Pixels.")
+                raise ValueError("pixels parameter requires (y, x, 3) array or 2D iterable of Pixels.")
         elif fillFunc is None:
-            self.pixels = _patternBlank(dims)
+            self.array = _patternBlank(dims)
         elif fillParameters is None:
-            self.pixels = fillFunc(dims)
+            self.array = fillFunc(dims)
         else:
-            self.pixels = fillFunc(dims, **fillParameters)
+            self.array = fillFunc(dims, **fillParameters)
             # x, y = dims
             # self.pixels = [[(0).to_bytes(res // 8, byteorder='little')] * x for i in range(y)]
 
         self.dims = dims
 
+    @property
+    def pixels(self):
+        """Rows of Pixel views onto the pixel buffer.  Kept for compatibility: prefer the array."""
+        return PixelGrid(self.array)
+
     @classmethod
-    def fromFile(cls, fileName):
+    def fromFile(cls, fileName, mode='r', bottomUp=False):
         """
-        Read a bitmap from file.  Not yet implemented.
-        :param fileName:
-        :return:
+        Read an uncompressed 16 or 24-bit BMP, such as writeBMP writes.  The pixel area is memory mapped rather than
+        read: for 24-bit files the pixel buffer is a strided view onto the padded BGR scan lines in the file, so nothing
+        is copied and only the pages actually used are loaded.  16-bit files have to be unpacked, so they are decoded
+        into a new buffer.
+
+        writeBMP stores the top row first, so by default scan lines are read in file order.
+
+        :param fileName: name of the file, '.bmp' is added if absent (as writeBMP does).
+        :param mode: memory map mode: 'r' read-only, 'r+' changes are written to the file, 'c' copy-on-write.
+        :param bottomUp: the file is a standard BMP from another tool, such as Pillow, whose positive height means the
+                         bottom row is stored first.  Files with a negative height are top row first either way.
+        :return: Bitmap
         """
-        # read file, and fill bitmap object from the data
-        dims = None
-        res = None
-        pixels = None
-        return NotImplemented
-        # return cls(dims, res, pixels)
+        fileName = str(fileName)
+        if not fileName.endswith('.bmp'):
+            fileName = '{}.bmp'.format(fileName)
+
+        with open(fileName, 'rb') as bmp:
+            header = bmp.read(54)
+        if len(header) < 54 or header[:2] != b'BM':
+            msg = "Not a BMP file: '{}'.".format(fileName)
+            raise ValueError(msg)
+
+        offset = int.from_bytes(header[10:14], byteorder='little')
+        width = int.from_bytes(header[18:22], byteorder='little', signed=True)
+        height = int.from_bytes(header[22:26], byteorder='little', signed=True)
+        bottomUp = bottomUp and height > 0
+        height = abs(height)
+        res = int.from_bytes(header[28:30], byteorder='little')
+        compression = int.from_bytes(header[30:34], byteorder='little')
+        if res not in [16, 24] or compression:
+            msg = "Unsupported BMP: {} bits per pixel, compression {}.".format(res, compression)
+            raise ValueError(msg)
+
+        lineBytes = (width * res) // 8
+        paddingSize = -lineBytes % 4
+        lines = np.memmap(fileName, dtype=np.uint8, mode=mode, offset=offset, shape=(height, lineBytes + paddingSize))
+        if res == 24:
+            pixels = lines[:, :lineBytes].reshape(height, width, 3)[:, :, ::-1]  # BGR -> RGB
+        else:  # 16-bit: 5 bits per channel
+            packed = lines[:, :lineBytes].view('<u2')
+            pixels = np.stack([packed >> 10, packed >> 5, packed], axis=-1) & 31
+            pixels = (pixels << 3).astype(np.uint8)
+        if bottomUp:
+            pixels = pixels[::-1]
+        return cls((width, height), pixels)
 
     @classmethod
-    def arbitrary(cls, dims):
-        """Arbitrary pattern selected from implemented patterns."""
-        choice = random.randint(0, 9)
+    def arbitrary(cls, dims, rng=None):
+        """
+        Arbitrary pattern selected from implemented patterns.
+
+        :param rng: random.Random, numpy Generator or seed, None for the random module
+        """
+        rng = shared.pythonRandom(rng)
+        choice = rng.randint(0, 9)
         colour1 = []
         colour2 = []
         for i in range(3):
-            channel1 = random.randint(0, 255)
-            channel2 = (channel1 + random.randint(16, 240)) % 256
+            channel1 = rng.randint(0, 255)
+            channel2 = (channel1 + rng.randint(16, 240)) % 256
             colour1.append(channel1)
             colour2.append(channel2)
         colour1 = tuple(colour1)
@@ -288,24 +296,24 @@ class Bitmap:
         print("Arbitrary Pattern ({}): {}; {}.".format(choice, colour1, colour2))
         if choice <= 1:
             gs = GaussianStore()
-            return gs.get(dims, index=choice)
+            return gs.get(dims, index=choice, rng=rng)
 
         elif choice <= 3:
-            angle1 = random.randint(0, 89)
-            angle2 = angle1 + random.randint(15, 104)
-            return cls.diamonds(dims, sizes=(random.randint(3, dims[0] // 2), random.randint(3, dims[1] // 2)),
+            angle1 = rng.randint(0, 89)
+            angle2 = angle1 + rng.randint(15, 104)
+            return cls.diamonds(dims, sizes=(rng.randint(3, dims[0] // 2), rng.randint(3, dims[1] // 2)),
                                 angles=(angle1, angle2), colour1=colour1, colour2=colour2)
         elif choice <= 6:
             maxstripewidth = min(dims) // 3
-            return cls.stripes(dims, angle=random.randint(-87, 83), stripewidth=random.randint(5, maxstripewidth),
+            return cls.stripes(dims, angle=rng.randint(-87, 83), stripewidth=rng.randint(5, maxstripewidth),
                                colour1=colour1, colour2=colour2)
         elif choice <= 8:
             maxchecksize = min(dims) // 2
-            return cls.checkerboard(dims, random.randint(12, maxchecksize), colour1, colour2)
+            return cls.checkerboard(dims, rng.randint(12, maxchecksize), colour1, colour2)
         elif choice <= 9:
-            return cls.gradient(dims, angle=random.randint(-47, 43), colour1=colour1, colour2=colour2)
+            return cls.gradient(dims, angle=rng.randint(-47, 43), colour1=colour1, colour2=colour2)
         else:  # This should be purely precautionary
-            return cls.blank(dims, colour=(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255)))
+            return cls.blank(dims, colour=(rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
 
     @classmethod
     def blank(cls, dims, colour=(255, 255, 255)):
@@ -332,8 +340,9 @@ class Bitmap:
         return cls(dims, fillFunc=_patternDiamonds2, fillParameters=fillParameters)
 
     @classmethod
-    def gaussian(cls, dims, colour=(0, 0, 0), mus=None, sigmas=None, delta=1, terminal=255):
-        fillParameters = {"colour": colour, "delta": delta, "mus": mus, "sigmas": sigmas, "terminal": terminal}
+    def gaussian(cls, dims, colour=(0, 0, 0), mus=None, sigmas=None, delta=1, terminal=255, rng=None):
+        fillParameters = {"colour": colour, "delta": delta, "mus": mus, "sigmas": sigmas, "terminal": terminal,
+                          "rng": rng}
         return cls(dims, fillFunc=_patternGaussian, fillParameters=fillParameters)
 
     @classmethod
@@ -410,6 +419,27 @@ class Bitmap:
 
         return header
 
+    def encodePixels(self, res=24):
+        """
+        Encode the whole pixel buffer as BMP pixel data in one pass: BGR (or 5-5-5 for 16-bit), each scan line zero
+        padded to the nearest 4-byte boundary.  Byte for byte what Pixel.to_bytes produces pixel by pixel.
+
+        :param res: 16 or 24 bits per pixel
+        :return: pixel data as bytes
+        """
+        ymax, xmax = self.array.shape[:2]
+        lineBytes = (xmax * res) // 8  # line size = pixels * bits per pixel
+        paddingSize = -lineBytes % 4
+
+        lines = np.zeros((ymax, lineBytes + paddingSize), dtype=np.uint8)
+        if res == 24:
+            lines[:, :lineBytes] = self.array[:, :, ::-1].reshape(ymax, lineBytes)
+        else:  # 16-bit: 5 bits per channel
+            channels = (self.array >> 3).astype(np.uint16)
+            packed = (channels[:, :, 0] << 10) | (channels[:, :, 1] << 5) | channels[:, :, 2]
+            lines[:, :lineBytes] = packed.astype('<u2').view(np.uint8).reshape(ymax, lineBytes)
+        return lines.tobytes()
+
     def writeBMP(self, filename, res=24):
         """
         Write the bitmap as a BMP bitmap.
@@ -425,7 +455,6 @@ class Bitmap:
 
         lineBytes = (self.dims[0] * res) // 8  # line size = pixels * bits per pixel
         paddingSize = -lineBytes % 4
-        paddingBytes = (0).to_bytes(1, 'little') * paddingSize  # # Pad to multiple of 4 bytes
 
         imageStorageSize = (lineBytes + paddingSize) * self.dims[1]  # Storage size = line size (bytes) * no. of lines
         headerSize = 14 + 40
@@ -434,25 +463,49 @@ class Bitmap:
         infoHeader = self.createInfoHeader(res)
 
         with open('{}.bmp'.format(filename), 'wb') as bmp:
-            bmp.write(fileHeader)
-            bmp.write(infoHeader)
-            for line in self.pixels:
-                for pixel in line:
-                    bmp.write(pixel.to_bytes(res // 8, 'little'))
-                bmp.write(paddingBytes)
+            bmp.write(fileHeader + infoHeader + self.encodePixels(res))
 
     def writeJPEG(self, filename):
         pass
 
 
+class PixelGrid:
+    """
+    Lightweight 2D sequence of Pixel views onto a (y, x, 3) pixel buffer.  Pixels are only created when indexed.
+    """
+    __slots__ = ("array",)
+
+    def __init__(self, array):
+        self.array = array
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, index):
+        if self.array.ndim == 2:  # A single row
+            if isinstance(index, slice):
+                return [Pixel.view(p) for p in self.array[index]]
+            return Pixel.view(self.array[index])
+        if isinstance(index, slice):
+            return [PixelGrid(row) for row in self.array[index]]
+        return PixelGrid(self.array[index])
+
+    def __iter__(self):
+        for i in range(len(self.array)):
+            yield self[i]
+
+
 class Pixel:
     """
     Representation of a pixel as 24 bit RGB (for now).
     Intent is to decouple pixel from resolution and encapsulate the colour conversions and bitwise crossover.
     Resolution only matters when reading from an existing image or at writeBMP stage.
 
+    A Pixel either owns its colour or is a view onto three bytes of a Bitmap's pixel buffer.
+
     Currently supports only 16-bit or 24-bit output.
     """
+    __slots__ = ("_rgb",)
 
     def __init__(self, colour=None, res=24):
         """
@@ -461,15 +514,39 @@ class Pixel:
         :param colour:
         :param res: resolution of input colour, to allow scaling to 24 bit, if necessary
         """
-        # self.rgb = None
+        self._rgb = None
         self._paint(colour, res)
 
+    @classmethod
+    def view(cls, buffer):
+        """
+        Pixel backed by a pixel buffer: reading and painting go straight to the buffer.
+        :param buffer: length 3 uint8 array
+        :return: Pixel
+        """
+        pixel = cls.__new__(cls)
+        pixel._rgb = buffer
+        return pixel
+
     def __repr__(self):
         return "{}(colour={})".format(self.__class__.__name__, self.rgb)
 
     def __str__(self):
         return self.rgb
 
+    @property
+    def rgb(self):
+        if isinstance(self._rgb, np.ndarray):
+            return tuple(int(c) for c in self._rgb)
+        return self._rgb
+
+    @rgb.setter
+    def rgb(self, rgb):
+        if isinstance(self._rgb, np.ndarray):
+            self._rgb[:] = rgb
+        else:
+            self._rgb = tuple(rgb)
+
     @staticmethod
     def _constructTupleFromNumber(value):
         """
@@ -551,24 +628,68 @@ class Pixel:
 class GaussianStore:
     """
     Cache gaussians to minimise generation time if reused.
+
+    Gaussians are keyed by (dims, index, variant, colour, delta, terminal) and persisted in 'folder' as .npy files that
+    are memory mapped when loaded, so worker processes share the pages and later runs reuse what has been generated.  The
+    loaded Bitmaps are read-only.  In memory the most recently used gaussians are kept, up to 'budget' bytes.
+
+    Each gaussian is drawn from a stream seeded by its key, so what is already stored never changes what get returns.
     """
-    gaussians = [None, None]
+    presets = [{"colour": (0, 0, 11), "delta": 3, "terminal": 254},
+               {"colour": (255, 255, 244), "delta": -3, "terminal": 2}]
+    gaussians = collections.OrderedDict()  # Shared by all stores in the process, least recently used first
     dims = None
+    folder = "gaussianstore"
+    budget = 2 ** 28  # bytes
+    variants = 4  # gaussians kept per preset, see get
 
     def __index__(self, index):
         return self.get(self.dims, index)
 
-    def __init__(self, dims=None):
+    def __init__(self, dims=None, folder=None, budget=None):
         if dims:
             self.dims = dims
-
-    def get(self, dims, index):
-        if 0 <= index <= 1:
-            if self.gaussians[index] is None:
-                if index == 0:
-                    self.gaussians[index] = Bitmap.gaussian(dims, colour=(0, 0, 11), delta=3, terminal=254)
-                elif index == 1:
-                    self.gaussians[index] = Bitmap.gaussian(dims, colour=(255, 255, 244), delta=-3, terminal=2)
-            return self.gaussians[index]
+        if folder:
+            self.folder = folder
+        if budget is not None:
+            self.budget = budget
+
+    def _filepath(self, key):
+        dims, index, variant, colour, delta, terminal = key
+        return pathlib.Path(self.folder) / "{}x{}_{}v{}_{},{},{}_{}_{}.npy".format(*dims, index, variant, *colour, delta,
+                                                                                 terminal)
+
+    def _evict(self):
+        """Drop least recently used gaussians until the cache is within budget.  The newest is always kept."""
+        while len(self.gaussians) > 1 and sum(bmp.array.nbytes for bmp in self.gaussians.values()) > self.budget:
+            self.gaussians.popitem(last=False)
+
+    def get(self, dims, index, rng=None):
+        """
+        :param dims: (width, height) of the gaussian
+        :param index: preset to use
+        :param rng: random.Random, numpy Generator or seed choosing one of the preset's variants, None for the first
+        :return: read-only Bitmap
+        """
+        if 0 <= index < len(self.presets):
+            preset = self.presets[index]
+            variant = 0 if rng is None else shared.pythonRandom(rng).randrange(self.variants)
+            key = (tuple(dims), index, variant, tuple(preset["colour"]), preset["delta"], preset["terminal"])
+            if key in self.gaussians:
+                self.gaussians.move_to_end(key)
+                return self.gaussians[key]
+
+            filepath = self._filepath(key)
+            if not filepath.exists():
+                filepath.parent.mkdir(parents=True, exist_ok=True)
+                temporary = filepath.with_name(filepath.name + ".{}.tmp".format(os.getpid()))
+                with temporary.open("wb") as target:
+                    stream = np.random.default_rng([*dims, index, variant])
+                    np.save(target, _patternGaussian(dims, **preset, rng=stream))
+                temporary.replace(filepath)  # Atomic: other processes never see a partial file
+
+            self.gaussians[key] = Bitmap(dims, np.load(filepath, mmap_mode='r'))
+            self._evict()
+            return self.gaussians[key]
         else:
             raise ValueError()
@@ -12,16 +12,21 @@ Mutation areas:
 Can we select the area and the mutation separately.
 """
 from bitmap import bitmap
-import random
+from concurrent.futures import ProcessPoolExecutor
+from fitness import Fitness
+import multiprocessing
+from shared import shared
+import numpy as np
 
 
-def _breedMonogamousRandom(currentGen, setcount=None, setsize=2):
+def _breedMonogamousRandom(currentGen, setcount=None, setsize=2, rng=None):
     """
     From a generation randomly select monogamous partnerships.
 
     :param currentGen:  A list of Bitmap objects
     :param setcount:    Total number of 'pairings'
     :param setsize:     How big is a breeding 'couple'?
+    :param rng:         random.Random, numpy Generator or seed, None for the random module
 
     :return: breeding 'pairs' as tuples.
     """
@@ -30,15 +35,72 @@ def _breedMonogamousRandom(currentGen, setcount=None, setsize=2):
     else:
         iters = min(setcount, len(currentGen) // setsize)
 
-    random.shuffle(currentGen)
+    shared.pythonRandom(rng).shuffle(currentGen)
     for i in range(iters):  # purely luck
         yield tuple(currentGen[:setsize])
         currentGen = currentGen[setsize:]
 
 
+def _breedSelected(currentGen, setcount, setsize, fitness, selectFunc, rng, **selectParams):
+    if setcount is None:
+        setcount = len(currentGen) // setsize
+    scores = fitness(np.stack([bmp.array for bmp in currentGen]))
+    for members in Fitness.selectSets(scores, setcount, setsize, selectFunc, rng, **selectParams):
+        yield tuple(currentGen[i] for i in members)
+
+
+def _breedTournament(currentGen, setcount=None, setsize=2, fitness=Fitness.score, tournamentSize=3, rng=None):
+    """
+    From a generation select partnerships by tournament: each partner is the fittest of tournamentSize random
+    candidates.  Fitter Bitmaps may breed more than once.
+
+    :param currentGen:  A list of Bitmap objects, all the same dims
+    :param setcount:    Total number of 'pairings'
+    :param setsize:     How big is a breeding 'couple'?
+    :param fitness:     Scorer over the (N, H, W, 3) generation array, see Fitness
+
+    :return: breeding 'pairs' as tuples.
+    """
+    return _breedSelected(currentGen, setcount, setsize, fitness, Fitness.tournamentSelect, rng,
+                          tournamentSize=tournamentSize)
+
+
+def _breedFitnessProportional(currentGen, setcount=None, setsize=2, fitness=Fitness.score, rng=None):
+    """
+    From a generation select partnerships with odds in proportion to fitness.  Fitter Bitmaps may breed more than
+    once.
+
+    :param currentGen:  A list of Bitmap objects, all the same dims
+    :param setcount:    Total number of 'pairings'
+    :param setsize:     How big is a breeding 'couple'?
+    :param fitness:     Scorer over the (N, H, W, 3) generation array, see Fitness
+
+    :return: breeding 'pairs' as tuples.
+    """
+    return _breedSelected(currentGen, setcount, setsize, fitness, Fitness.proportionalSelect, rng)
+
+
+def _breedPair(pair, crossoverChance, rng):
+    """
+    Breed one pair with its own random stream.  Module level so that it can be sent to worker processes.
+
+    :param rng: the pair's substream, see shared.spawnRandom
+    :return: list of offspring Bitmaps
+    """
+    fit = FullImageTranscriber.multiple(*pair, crossoverChance=crossoverChance, rng=rng)
+    return fit.transcribe()
+
+
 class Breeder:
     def __init__(self, breedPatternFunc=_breedMonogamousRandom, breedPatternParams={"setcount": 5}, dims=None,
-                 genSize=10, gen0=None):
+                 genSize=10, gen0=None, processes=None, offspring=None, rng=None):
+        """
+        :param processes: number of worker processes to breed with, None or 1 to breed in this process.
+        :param offspring: when resuming, the generation already yielded from gen0 (gen0 itself if that was the first).
+                          Iteration carries on after it instead of yielding gen0.
+        :param rng: random.Random, numpy Generator or seed for all breeding, None for the random module.
+        """
+        self.rng = shared.pythonRandom(rng)
         if gen0:
             self.currentGen = gen0
             self.dims = gen0[0].dims
@@ -47,18 +109,48 @@ class Breeder:
             self.currentGen = []
             self.dims = dims
             for i in range(genSize):
-                self.currentGen.append(bitmap.Bitmap.arbitrary(dims))
+                self.currentGen.append(bitmap.Bitmap.arbitrary(dims, self.rng))
 
         self.breedPatternFunc = breedPatternFunc
         self.breedPatternParams = breedPatternParams
+        self.processes = processes
+        self.offspring = offspring
+
+    def checkpointArrays(self, generation):
+        """
+        Arrays to checkpoint while generation, as just yielded, is current.  See fromCheckpointArrays.
+
+        :return: dict of name to (N, H, W, 3) array
+        """
+        arrays = {"parents": np.stack([bmp.array for bmp in self.currentGen])}
+        if generation is not self.currentGen:
+            arrays["offspring"] = np.stack([bmp.array for bmp in generation])
+        return arrays
 
     @classmethod
-    def firstSet(cls, dims=(540, 540)):
+    def fromCheckpointArrays(cls, arrays, **kwargs):
+        """Resume a breeder from checkpointArrays.  Any other parameters are passed to the constructor."""
+        gen0 = [bitmap.Bitmap((a.shape[1], a.shape[0]), a) for a in arrays["parents"]]
+        if "offspring" in arrays:
+            offspring = [bitmap.Bitmap((a.shape[1], a.shape[0]), a) for a in arrays["offspring"]]
+        else:
+            offspring = gen0
+        return cls(gen0=gen0, offspring=offspring, **kwargs)
+
+    def _advance(self, genNext):
+        """Fill out a yielded generation and make it current."""
+        genNext.extend(self.rng.sample(self.currentGen, 2))  # select images from previous generation
+        genNext.append(bitmap.Bitmap.arbitrary(self.dims, self.rng))
+        self.currentGen = genNext
+
+    @classmethod
+    def firstSet(cls, dims=(540, 540), rng=None):
+        rng = shared.pythonRandom(rng)
         gs = bitmap.GaussianStore(dims)
         gen0 = [
             bitmap.Bitmap.diamonds(dims, sizes=(16, 16), angles=(10, 70),
                                    colour1=(218, 205, 255), colour2=(96, 15, 96)),
-            bitmap.Bitmap.stripes(dims, random.randint(13, 63), random.randint(7, 15), (255, 255, 128), (96, 0, 8)),
+            bitmap.Bitmap.stripes(dims, rng.randint(13, 63), rng.randint(7, 15), (255, 255, 128), (96, 0, 8)),
             bitmap.Bitmap.checkerboard(dims, 54, (224, 255, 255), (31, 0, 0)),
             bitmap.Bitmap.stripes(dims, 71, 23.4, (255, 224, 255), (0, 15, 0)),
             bitmap.Bitmap.checkerboard(dims, 45, (224, 255, 224), (0, 48, 0)),
@@ -66,27 +158,44 @@ class Breeder:
             bitmap.Bitmap.gradient(dims, angle=-25, colour1=(108, 31, 133), colour2=(129, 106, 255)),
             gs.get(dims, 1),
             bitmap.Bitmap.stripes(dims, stripewidth=14, angle=100, colour1=(221, 237, 7), colour2=(7, 96, 192)),
-            bitmap.Bitmap.gradient(dims, angle=random.randint(-19, 17),
-                                   colour1=(random.randint(96, 158), random.randint(0, 140), random.randint(128, 255)),
-                                   colour2=(random.randint(0, 95), random.randint(128, 255), random.randint(0, 101)))
+            bitmap.Bitmap.gradient(dims, angle=rng.randint(-19, 17),
+                                   colour1=(rng.randint(96, 158), rng.randint(0, 140), rng.randint(128, 255)),
+                                   colour2=(rng.randint(0, 95), rng.randint(128, 255), rng.randint(0, 101)))
         ]
         return cls(breedPatternFunc=_breedMonogamousRandom, breedPatternParams={"setcount": 5},
-                   dims=dims, gen0=gen0, genSize=10)
+                   dims=dims, gen0=gen0, genSize=10, rng=rng)
 
 
 class CrosserMonogamous(Breeder):
     def __iter__(self):
-        yield self.currentGen
-        while (True):
-            genNext = []
-            for pair in self.breedPatternFunc(self.currentGen, **self.breedPatternParams):
-                fit = FullImageTranscriber.multiple(*pair, crossoverChance=random.randint(1, 7) / (
-                        540 ** 2))  # ~1-7 crossovers per pair
-                genNext.extend(fit.transcribe())
-            yield genNext
-            genNext.extend(random.sample(self.currentGen, 2))  # select images from previous generation
-            genNext.append(bitmap.Bitmap.arbitrary(self.dims))
-            self.currentGen = genNext
+        """
+        Each pair is bred with its own substream of the breeder's rng, so a generation is the same whether it is bred
+        in this process or spread over a process pool.
+        """
+        if self.offspring is None:
+            yield self.currentGen
+        elif self.offspring is not self.currentGen:
+            self._advance(self.offspring)
+        self.offspring = None
+        executor = None
+        if self.processes and self.processes > 1:
+            # Spawned, not forked: the caller may have writer threads running, which a fork could deadlock on
+            executor = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            while (True):
+                pairs = list(self.breedPatternFunc(self.currentGen, rng=self.rng, **self.breedPatternParams))
+                chances = [self.rng.randint(1, 7) / (540 ** 2) for pair in pairs]  # ~1-7 crossovers per pair
+                streams = shared.spawnRandom(self.rng, len(pairs))
+
+                genNext = []
+                breeder = executor.map if executor else map
+                for offspring in breeder(_breedPair, pairs, chances, streams):
+                    genNext.extend(offspring)
+                yield genNext
+                self._advance(genNext)
+        finally:
+            if executor:
+                executor.shutdown()
 
 
 class FullImageTranscriber:
@@ -94,92 +203,91 @@ class FullImageTranscriber:
     Transcribe the complete image with some crossover and mutations.
     """
 
-    def __init__(self, parent1: bitmap.Bitmap, parent2: bitmap.Bitmap, crossoverChance=0, crossoverPositions=[]):
+    def __init__(self, parent1: bitmap.Bitmap, parent2: bitmap.Bitmap, crossoverChance=0, crossoverPositions=[],
+                 rng=None):
+        """
+        :param rng: random.Random, numpy Generator or seed to draw crossover positions from, None for the random
+                    module.
+        """
         self.xmax = min(parent1.dims[0], parent2.dims[0])
         self.ymax = min(parent1.dims[1], parent2.dims[1])
         pixelCount = self.ymax * self.xmax
         self.crossoverPositions = crossoverPositions + [pixelCount]
         if crossoverChance:
-            for i in range(pixelCount):
-                if random.random() < crossoverChance:
-                    self.crossoverPositions.append(i)
+            self.crossoverPositions.extend(shared.randomCrossoverPositions(pixelCount, crossoverChance, rng))
 
-        self.crossoverPositions = [round(p) for p in sorted(self.crossoverPositions, reverse=True)]
-        self.psParent1 = [p for row in parent1.pixels[:self.ymax] for p in row[:self.xmax]]
-        self.psParent2 = [p for row in parent2.pixels[:self.ymax] for p in row[:self.xmax]]
+        self.crossoverPositions = [shared.clipValue(round(p), 0, pixelCount)
+                                   for p in sorted(self.crossoverPositions, reverse=True)]
+        self.psParent1 = parent1.array[:self.ymax, :self.xmax].reshape(pixelCount, 3)
+        self.psParent2 = parent2.array[:self.ymax, :self.xmax].reshape(pixelCount, 3)
         # print("p1:{}, p2:{}".format(len(self.psParent1), len(self.psParent2)))
 
-    @staticmethod
-    def _chop(pixels, rowLen):
-        rows = []
-        while pixels:
-            row = pixels[:rowLen]
-            rows.append(row)
-            pixels = pixels[rowLen:]
-        return rows
-
     @staticmethod
     def _listMutationReverse(self, pixels):
         """Transcription mutation that reverses the list."""
         return list(pixels.reversed())
 
     @staticmethod
-    def _listMutationRotate(self, pixels, rotation=None):
-        """Transcription mutation that bytewise rotates the list."""
-        cutoff = random.randint(1, len(pixels) - 2)
+    def _listMutationRotate(self, pixels, rotation=None, rng=None):
+        """
+        Transcription mutation that bytewise rotates the list.
+
+        :param rng: random.Random, numpy Generator or seed, None for the random module
+        """
+        cutoff = shared.pythonRandom(rng).randint(1, len(pixels) - 2)
         return pixels[cutoff:] + pixels[:cutoff]
 
     def transcribe(self):
-        """Include possible mutations as dict/tuple with funcs and concomitant probabilities?"""
-        psOffspring1 = []
-        psOffspring2 = []
+        """
+        Include possible mutations as dict/tuple with funcs and concomitant probabilities?
+
+        Each offspring starts as a flat copy of one parent; alternate segments between crossover positions are then
+        overwritten in place from the other parent.  The offspring Bitmaps are 2D views of those flat buffers.
+        """
+        psOffspring1 = self.psParent1.copy()
+        psOffspring2 = self.psParent2.copy()
         # print(self.crossoverPositions)
 
         currentStartPos = 0
         crossed = True
         while self.crossoverPositions:
-            # print("p1:{}, p2:{}".format(len(psOffspring1), len(psOffspring2)))
             pos = self.crossoverPositions.pop()
-            excerpt1 = self.psParent1[currentStartPos:pos]
-            excerpt2 = self.psParent2[currentStartPos:pos]
             # mutate excerpts here? #
             if crossed:
-                psOffspring2.extend(excerpt1)
-                psOffspring1.extend(excerpt2)
-            else:
-                psOffspring1.extend(excerpt1)
-                psOffspring2.extend(excerpt2)
+                psOffspring1[currentStartPos:pos] = self.psParent2[currentStartPos:pos]
+                psOffspring2[currentStartPos:pos] = self.psParent1[currentStartPos:pos]
             crossed = not crossed
             currentStartPos = pos
 
-        # print("p1:{}, p2:{}".format(len(psOffspring1), len(psOffspring2)))
-        return [bitmap.Bitmap((self.xmax, self.ymax), self._chop(psOffspring1, self.xmax)),
-                bitmap.Bitmap((self.xmax, self.ymax), self._chop(psOffspring2, self.xmax))]
+        shape = (self.ymax, self.xmax, 3)
+        return [bitmap.Bitmap((self.xmax, self.ymax), psOffspring1.reshape(shape)),
+                bitmap.Bitmap((self.xmax, self.ymax), psOffspring2.reshape(shape))]
 
     @classmethod
-    def double(cls, bmp1: bitmap.Bitmap, bmp2: bitmap.Bitmap, positions=None):
+    def double(cls, bmp1: bitmap.Bitmap, bmp2: bitmap.Bitmap, positions=None, rng=None):
+        rng = shared.pythonRandom(rng)
         xmax = min(bmp1.dims[0], bmp2.dims[0])
         ymax = min(bmp1.dims[1], bmp2.dims[1])
         pixelCount = ymax * xmax
         if not positions:
-            positions = [random.gauss(mu=pixelCount / 3, sigma=pixelCount * 0.066)]
+            positions = [rng.gauss(mu=pixelCount / 3, sigma=pixelCount * 0.066)]
         if len(positions) < 2:
             centre = pixelCount - positions[0] / 2
             deviation = pixelCount * 0.066
-            positions.append(random.gauss(mu=centre, sigma=deviation))
+            positions.append(rng.gauss(mu=centre, sigma=deviation))
         return cls(bmp1, bmp2, crossoverPositions=positions)
 
     @classmethod
-    def multiple(cls, bmp1: bitmap.Bitmap, bmp2: bitmap.Bitmap, crossoverChance=0.001):
-        return cls(bmp1, bmp2, crossoverChance=crossoverChance)
+    def multiple(cls, bmp1: bitmap.Bitmap, bmp2: bitmap.Bitmap, crossoverChance=0.001, rng=None):
+        return cls(bmp1, bmp2, crossoverChance=crossoverChance, rng=rng)
 
     @classmethod
-    def single(cls, bmp1: bitmap.Bitmap, bmp2: bitmap.Bitmap, position=None):
+    def single(cls, bmp1: bitmap.Bitmap, bmp2: bitmap.Bitmap, position=None, rng=None):
         if position is None:
             xmax = min(bmp1.dims[0], bmp2.dims[0])
             ymax = min(bmp1.dims[1], bmp2.dims[1])
             pixelCount = ymax * xmax
             centre = pixelCount / 2
             deviation = pixelCount * 0.1
-            position = random.gauss(mu=centre, sigma=deviation)
+            position = shared.pythonRandom(rng).gauss(mu=centre, sigma=deviation)
         return cls(bmp1, bmp2, crossoverPositions=[position])
@@ -0,0 +1,95 @@
+"""
+Checkpoint long evolution runs so they can be resumed after a crash.
+
+A checkpoint is a single .npz holding the population arrays, the random stream's state, the generation index and the
+run's parameters as JSON.  Arrays are stored uncompressed by default so that saving and loading run at disk speed.
+"""
+import json
+import pathlib
+import random
+
+import numpy as np
+
+FILENAME = "checkpoint_{:06d}.npz"
+
+
+def _checkRandom(rng):
+    """A seed has no state to save or restore into, so only streams are accepted."""
+    if not (rng is None or isinstance(rng, (random.Random, np.random.Generator))):
+        msg = "rng must be None, a random.Random or a numpy Generator, not {}".format(type(rng).__name__)
+        raise TypeError(msg)
+
+
+def save(folder, generation, arrays, params=None, compress=False, keep=2, rng=None):
+    """
+    Write a checkpoint.  It is written to a temporary file first, so a crash mid-save leaves the previous checkpoint
+    intact.
+
+    :param folder: folder to keep checkpoints in, created if need be
+    :param generation: index of the generation the arrays hold
+    :param arrays: dict of name to array, for example the population
+    :param params: JSON serialisable dict of the run's parameters
+    :param compress: deflate the arrays, smaller but slower
+    :param keep: most recent checkpoints to keep in the folder, all if None
+    :param rng: random.Random or numpy Generator whose state to save, None for the random module
+    :return: path of the checkpoint
+    """
+    _checkRandom(rng)
+    folder = pathlib.Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    meta = {"generation": generation, "params": params or {}}
+    if isinstance(rng, np.random.Generator):
+        meta["generatorState"] = rng.bit_generator.state
+        internal = ()
+    else:
+        version, internal, meta["gaussNext"] = (rng or random).getstate()
+        meta["randomVersion"] = version
+
+    filepath = folder / FILENAME.format(generation)
+    temporary = filepath.with_name(filepath.name + ".tmp")
+    with temporary.open("wb") as target:
+        (np.savez_compressed if compress else np.savez)(target, meta=np.array(json.dumps(meta)),
+                                                        randomState=np.array(internal, dtype=np.uint64), **arrays)
+    temporary.replace(filepath)
+
+    if keep is not None:
+        for stale in checkpoints(folder)[:-keep]:
+            stale.unlink()
+    return filepath
+
+
+def checkpoints(folder):
+    """:return: sorted paths of the checkpoints in a folder, oldest first"""
+    return sorted(pathlib.Path(folder).glob(FILENAME.replace("{:06d}", "[0-9]" * 6)))
+
+
+def latest(folder):
+    """:return: path of the most recent checkpoint in a folder, None if there are none"""
+    found = checkpoints(folder)
+    return found[-1] if found else None
+
+
+def load(filepath, restoreRandom=True, rng=None):
+    """
+    Read a checkpoint.
+
+    :param filepath: path of the checkpoint
+    :param restoreRandom: put the random stream back in the state it was saved in
+    :param rng: random.Random or numpy Generator to restore the state into, None for the random module.  It must be
+                the same kind of stream as the checkpoint was saved from.
+    :return: (generation, dict of name to array, params)
+    """
+    _checkRandom(rng)
+    with np.load(filepath) as contents:
+        meta = json.loads(str(contents["meta"]))
+        internal = tuple(int(i) for i in contents["randomState"])
+        arrays = {name: contents[name] for name in contents.files if name not in ("meta", "randomState")}
+    if restoreRandom:
+        if isinstance(rng, np.random.Generator) != ("generatorState" in meta):
+            msg = "{} was not saved from a stream of the same kind as rng".format(filepath)
+            raise TypeError(msg)
+        if isinstance(rng, np.random.Generator):
+            rng.bit_generator.state = meta["generatorState"]
+        else:
+            (rng or random).setstate((meta["randomVersion"], internal, meta["gaussNext"]))
+    return meta["generation"], arrays, meta["params"]
@@ -0,0 +1,217 @@
+"""
+Score a whole generation of images in one call.
+
+A scorer takes an (N, H, W, 3) uint8 population array and returns N scores in [0, 1], higher being fitter.  Selection
+functions then pick parents by index from those scores.
+"""
+import math
+
+import numpy as np
+
+from shared import shared
+
+LUMA = (77, 150, 29)  # Rec. 601 luma weights in 8-bit fixed point, so an 8-bit image's luma fits in uint16
+
+
+def colourHistograms(population, bins=8):
+    """
+    Normalised colour histograms, each channel quantised into bins levels.
+
+    :param population: (N, H, W, 3) uint8 array
+    :return: (N, bins ** 3) float array, each row summing to 1
+    """
+    population = np.asarray(population)
+    n = len(population)
+    levels = (population.reshape(n, -1, 3).astype(np.uint16) * bins) >> 8
+    indices = (levels[..., 0].astype(np.intp) * bins + levels[..., 1]) * bins + levels[..., 2]
+    indices += np.arange(n, dtype=np.intp)[:, np.newaxis] * bins ** 3  # a run of bins ** 3 counts per image
+    counts = np.bincount(indices.ravel(), minlength=n * bins ** 3).reshape(n, bins ** 3)
+    return counts / counts.sum(axis=1, keepdims=True)
+
+
+def histogramScorer(target, bins=8):
+    """
+    Scorer for closeness to a target's colour histogram: one less half the L1 distance between histograms.
+
+    :param target: (H, W, 3) array to match, need not share the population's dims
+    :return: scorer function
+    """
+    targetHistogram = colourHistograms(np.asarray(target)[np.newaxis], bins)[0]
+
+    def scorer(population):
+        return 1 - np.abs(colourHistograms(population, bins) - targetHistogram).sum(axis=1) / 2
+
+    return scorer
+
+
+def edgeDensity(population, threshold=32):
+    """
+    Scorer: the proportion of pixels whose luminance differs from the pixel to the right or below by more than the
+    threshold.  Luminance is kept in 16-bit fixed point rather than floats, to hold down memory on large populations.
+    """
+    population = np.asarray(population)
+    luma = np.zeros(population.shape[:3], dtype=np.uint16)
+    for channel, weight in enumerate(LUMA):
+        luma += population[..., channel] * np.uint16(weight)
+    pixel, right, below = luma[:, :-1, :-1], luma[:, :-1, 1:], luma[:, 1:, :-1]
+    limit = threshold << 8
+    dx = np.maximum(pixel, right) - np.minimum(pixel, right)  # Unsigned, so no wrapping difference
+    dy = np.maximum(pixel, below) - np.minimum(pixel, below)
+    return ((dx > limit) | (dy > limit)).mean(axis=(1, 2))
+
+
+def entropy(population, bins=8):
+    """Scorer: Shannon entropy of each colour histogram, as a fraction of the most possible for the bins."""
+    histograms = colourHistograms(population, bins)
+    logs = np.log2(histograms, out=np.zeros_like(histograms), where=histograms > 0)
+    return -(histograms * logs).sum(axis=1) / math.log2(bins ** 3)
+
+
+def score(population, scorers=(entropy, edgeDensity), weights=None):
+    """
+    Weighted mean of several scorers.
+
+    :param population: (N, H, W, 3) uint8 array
+    :param scorers: scorer functions
+    :param weights: one weight per scorer, equal if None
+    :return: (N,) array of scores
+    """
+    if weights is None:
+        weights = [1] * len(scorers)
+    total = sum(w * np.asarray(scorer(population), dtype=float) for scorer, w in zip(scorers, weights))
+    return total / sum(weights)
+
+
+def tournamentSelect(scores, exclude=(), tournamentSize=3, rng=None):
+    """
+    Pick the fittest of a few random candidates.
+
+    :param scores: sequence of scores
+    :param exclude: indices that may not be picked
+    :param rng: random.Random, numpy Generator or seed, None for the random module
+    :return: index of the winner
+    """
+    candidates = [i for i in range(len(scores)) if i not in exclude]
+    entrants = shared.pythonRandom(rng).sample(candidates, min(tournamentSize, len(candidates)))
+    return max(entrants, key=lambda i: scores[i])
+
+
+def proportionalSelect(scores, exclude=(), rng=None):
+    """
+    Roulette wheel selection: pick with odds in proportion to score.  Scores below zero count as zero and if every
+    candidate scores zero the pick is even.
+
+    :return: index of the pick
+    """
+    candidates = [i for i in range(len(scores)) if i not in exclude]
+    weights = [max(scores[i], 0) for i in candidates]
+    if not any(weights):
+        weights = None
+    return shared.pythonRandom(rng).choices(candidates, weights=weights)[0]
+
+
+def selectSets(scores, setcount, setsize=2, selectFunc=tournamentSelect, rng=None, **selectParams):
+    """
+    Pick breeding sets.  Members of a set are distinct, but an individual may be picked for more than one set.
+
+    :param scores: sequence of scores
+    :param setcount: number of sets
+    :param setsize: members per set
+    :param selectFunc: selection function such as tournamentSelect or proportionalSelect
+    :param rng: random.Random, numpy Generator or seed, None for the random module
+    :return: list of tuples of indices
+    """
+    rng = shared.pythonRandom(rng)
+    sets = []
+    for i in range(setcount):
+        members = []
+        for j in range(setsize):
+            members.append(selectFunc(scores, exclude=members, rng=rng, **selectParams))
+        sets.append(tuple(members))
+    return sets
+
+
+def downsample(population, factor):
+    """
+    Block mean thumbnails.  Edge rows and columns that do not fill a block are dropped.
+
+    :param population: (N, H, W, 3) array
+    :param factor: block side, in pixels
+    :return: (N, H // factor, W // factor, 3) float32 array
+    """
+    n, height, width, channels = population.shape
+    height, width = height // factor, width // factor
+    blocks = population[:, :height * factor, :width * factor].reshape(n, height, factor, width, factor, channels)
+    return blocks.mean(axis=(2, 4), dtype=np.float32)
+
+
+class ThumbnailCache:
+    """
+    Downsampled copies of a population, double buffered like Population.  Crossing is mirrored on the thumbnails from
+    the mask alone, so they are never recomputed from the full images.  The update is exact for blocks the mask covers
+    wholly or not at all; blocks straddling the edge of a tile take the mix in proportion to their coverage.
+    """
+
+    def __init__(self, population, factor=8):
+        """
+        :param population: (N, H, W, 3) array to take the first thumbnails from
+        :param factor: block side, in pixels
+        """
+        self.factor = factor
+        current = downsample(population, factor)
+        self._buffers = [current, np.empty_like(current)]
+
+    @property
+    def current(self):
+        return self._buffers[0]
+
+    @property
+    def next(self):
+        return self._buffers[1]
+
+    def images(self):
+        """:return: current thumbnails as an (N, h, w, 3) uint8 array, for scorers"""
+        return np.rint(self.current).astype(np.uint8)
+
+    def cross(self, parents, children, mask):
+        """
+        Mirror ImageCrosser.crossMaskedArrays: write the crossed parents' thumbnails into the next generation.
+
+        :param parents: pair of indices into the current generation
+        :param children: pair of indices into the next generation
+        :param mask: boolean (H, W) mask the parents were crossed through
+        """
+        height, width = self.current.shape[1:3]
+        f = self.factor
+        fraction = mask[:height * f, :width * f].reshape(height, f, width, f).mean(axis=(1, 3), dtype=np.float32)
+        fraction = fraction[..., np.newaxis]
+        a, b = (self.current[i] for i in parents)
+        self.next[children[0]] = a + (b - a) * fraction
+        self.next[children[1]] = b + (a - b) * fraction
+
+    def swap(self):
+        """Make the next generation current."""
+        self._buffers.reverse()
+
+
+def proxyScore(population, thumbnails, scorer=score, topK=None):
+    """
+    Score every candidate on its thumbnail, then rescore the best topK at full resolution.  The rest keep their proxy
+    score, capped so that none outranks a rescored candidate.
+
+    :param population: (N, H, W, 3) uint8 array
+    :param thumbnails: (N, h, w, 3) uint8 array, see ThumbnailCache.images
+    :param scorer: scorer function
+    :param topK: number of candidates to rescore, a quarter of the population (at least 2) if None
+    :return: (N,) array of scores
+    """
+    if topK is None:
+        topK = max(2, len(population) // 4)
+    scores = np.asarray(scorer(thumbnails), dtype=float)
+    top = np.sort(np.argsort(-scores, kind="stable")[:topK])
+    refined = np.asarray(scorer(population[top]), dtype=float)
+    rest = np.ones(len(scores), dtype=bool)
+    rest[top] = False
+    scores[rest] = np.minimum(scores[rest], refined.min())
+    scores[top] = refined
+    return scores
@@ -1,12 +1,17 @@
 """
 Experiment to use Pillow to create JPEGS
 """
+import argparse
 import datetime
 import os
 import random
 
+from checkpoint import Checkpoint
+from fitness import Fitness
 from imagecrosser import ImageCrosser
+from imagewriter import ImageWriter
 from patternedimage import PatternedImage
+from population import Population
 from shared import shared
 
 if __name__ == '__main__':
@@ -17,29 +22,67 @@ if __name__ == '__main__':
     # img = PatternedImage.new(PatternedImage.stripedMulti, dims=dims, colours=shared.randomRGBContrasting(5))
     # img = PatternedImage.new(PatternedImage.diamonds, dims=dims, colours=shared.randomRGBPair())
 
-    currentGen = [PatternedImage.new(dims=dims) for i in range(10)]
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resume", metavar="FOLDER",
+                        help="generation folder of a run to resume from its latest checkpoint")
+    parser.add_argument("--checkpoint-interval", type=int, metavar="N",
+                        help="checkpoint every N generations, 3 or the resumed run's interval if not given")
+    parser.add_argument("--seed", type=int, help="seed for a reproducible run")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
 
-    now = datetime.datetime.now()
-    folder = now.strftime("generations\%Y%m%d_%H%M%S")
-    os.mkdir(folder)
+    if args.resume:
+        folder = args.resume
+        latest = Checkpoint.latest(os.path.join(folder, "checkpoints"))
+        if latest is None:
+            parser.error("no checkpoint in {}".format(folder))
+        genStart, arrays, params = Checkpoint.load(latest, rng=rng)
+        print("Resuming from generation {}".format(genStart))
+        dims, counts = tuple(params.get("dims", dims)), tuple(params.get("counts", (2, 5)))
+        interval = args.checkpoint_interval or params.get("checkpointInterval", 3)
+        population = Population.Population.fromImages(arrays["population"])
+        thumbnails = Fitness.ThumbnailCache(population.current)
+        thumbnails.current[...] = arrays["thumbnails"]
+    else:
+        counts = (2, 5)  # range of tiles across and down each crossing's tessellation
+        interval = args.checkpoint_interval or 3
+        population = Population.Population.fromImages([PatternedImage.new(dims=dims, rng=rng) for i in range(10)])
+        thumbnails = Fitness.ThumbnailCache(population.current)
 
-    for genID in range(12):
-        print("\nWriting generation {}: ".format(genID), end='')
-        count = 0
-        for img in currentGen:
-            print("{}, ".format(count), end='')
+        now = datetime.datetime.now()
+        folder = now.strftime("generations\%Y%m%d_%H%M%S")
+        os.mkdir(folder)
+        genStart = 0
+    params = {"dims": dims, "counts": counts, "checkpointInterval": interval, "seed": args.seed}
 
-            # img.save("{}\gen{}_{}.jpg".format(folder, genID, count))
-            img.save("{}\gen{}_{}.png".format(folder, genID, count))
-            count += 1
+    with population, ImageWriter.ImageWriter(workers=os.cpu_count()) as writer:
+        for genID in range(genStart, 12):
+            print("\nWriting generation {}: ".format(genID), end='')
+            count = 0
+            for img in population.images():
+                print("{}, ".format(count), end='')
 
-        random.shuffle(currentGen)
-        nextGen = []
-        for i in range(len(currentGen) // 2):
-            nextGen.extend(ImageCrosser.crossTesselated([currentGen[2 * i], currentGen[2 * i + 1]],
-                                                        counts=(random.randint(2, 5), random.randint(2, 5))))
-        currentGen = nextGen
+                # img.save("{}\gen{}_{}.jpg".format(folder, genID, count))
+                writer.save(img, "{}\gen{}_{}.png".format(folder, genID, count))
+                count += 1
 
-    for d in dpis:
-        for img in currentGen:
-            img.save("{}\gen{}_{}_{}dpi.jpg".format(folder, genID, count, d), dpi=(d, d))
+            scores = Fitness.proxyScore(population.current, thumbnails.images())
+            parents, children = None, population.next
+            for i, (a, b) in enumerate(Fitness.selectSets(scores, len(population) // 2, rng=rng)):
+                parents = [population[a], population[b]]
+                mask = ImageCrosser.tessellatedMask(parents, counts=(rng.randint(*counts), rng.randint(*counts)),
+                                                    rng=rng)
+                ImageCrosser.crossMaskedArrays(parents, mask, out=children[2 * i:2 * i + 2])
+                thumbnails.cross((a, b), (2 * i, 2 * i + 1), mask)
+            del parents, children  # views into the blocks must not outlive the population
+            population.swap()
+            thumbnails.swap()
+
+            if (genID + 1) % interval == 0 and genID + 1 < 12:  # bred, but not yet written
+                writer.flush()
+                Checkpoint.save(os.path.join(folder, "checkpoints"), genID + 1,
+                                {"population": population.current, "thumbnails": thumbnails.current}, params, rng=rng)
+
+        for d in dpis:
+            for img in population.images():
+                writer.save(img, "{}\gen{}_{}_{}dpi.jpg".format(folder, genID, count, d), dpi=(d, d))
@@ -13,32 +13,65 @@ Ultimately a set of tessera can encapsulate each of these scopes.  For 1 & 2 thi
 number.
 """
 
+import functools
+import inspect
 import math
-import random
+
+from PIL import Image, ImageDraw
+import numpy as np
+
+from shared import shared
+
+
+def crossMasked(images, mask):
+    """
+    Cross two images through a mask: the children take the other parent's pixels wherever the mask is True.
+
+    :param images: pair of images
+    :param mask: boolean (H, W) array covering the overlap of the images
+    :return: pair of crossed images
+    """
+    children = crossMaskedArrays([np.asarray(img) for img in images[:2]], mask)
+    return [Image.fromarray(child) for child in children]
+
+
+def crossMaskedArrays(arrays, mask, out=None):
+    """
+    Array form of crossMasked.  Outside the overlap each child keeps its own parent's pixels.
+
+    :param arrays: pair of (H, W, channels) arrays
+    :param mask: boolean (H, W) array covering the overlap of the arrays
+    :param out: optional pair of preallocated arrays, shaped as the parents, to write the children into.  These must
+                not share memory with the parents.
+    :return: pair of crossed arrays
+    """
+    if out is None:
+        out = [np.empty_like(a) for a in arrays[:2]]
+    ymax, xmax = mask.shape
+    where = mask[..., np.newaxis] if arrays[0].ndim == 3 else mask
+    for child, parent, other in zip(out, arrays, arrays[::-1]):
+        np.copyto(child, parent)
+        np.copyto(child[:ymax, :xmax], other[:ymax, :xmax], where=where)
+    return out
 
 
 def crossSubImage(images):
-    pair = [img.copy() for img in images[:2]]
-    for area in selectSubRegion(images):
-        region0 = pair[0].crop(area)
-        region1 = pair[1].crop(area)
-        pair[0].paste(region1, box=area)
-        pair[1].paste(region0, box=area)
-    return pair
+    return crossMasked(images, subRegionMask(images))
 
 
-def crossTesselated(images, counts=(3, 3)):
-    pair = [img.copy() for img in images[:2]]
-    for area in tessellatedAreas(images, counts):
-        if random.choice([0, 1]):
-            region0 = pair[0].crop(area)
-            region1 = pair[1].crop(area)
-            pair[0].paste(region1, box=area)
-            pair[1].paste(region0, box=area)
-    return pair
+def crossTesselated(images, counts=(3, 3), rng=None):
+    return crossMasked(images, tessellatedMask(images, counts, rng))
 
 
-def crossWholeArea(images, mutations=[]):
+def crossWholeArea(images, mutations=[], rng=None):
+    """
+    :param mutations: functions of (regions) returning the mutated pair of regions.  Those that take an rng keyword
+                      are passed the stream.
+    :param rng: random.Random, numpy Generator or seed passed on to the mutations, None for the random module
+    """
+    rng = shared.pythonRandom(rng)
+    mutations = [functools.partial(mutation, rng=rng) if _acceptsRandom(mutation) else mutation
+                 for mutation in mutations]
     pair = [img.copy() for img in images[:2]]
     for area in wholeArea(images):
         regions = [img.crop(area) for img in pair]
@@ -49,8 +82,21 @@ def crossWholeArea(images, mutations=[]):
     return pair
 
 
+def _acceptsRandom(func):
+    """:return: whether func can be called with an rng keyword"""
+    try:
+        parameters = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):  # Builtins without a signature
+        return False
+    return any(p.name == "rng" or p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters)
+
+
 def calculateOverlap(images):
-    sizes = [img.size for img in images]
+    """
+    :param images: Images or (H, W, channels) arrays
+    :return: [width, height] common to all of the images
+    """
+    sizes = [img.size if isinstance(img, Image.Image) else (img.shape[1], img.shape[0]) for img in images]
     return [min(dims) for dims in zip(*sizes)]
 
 
@@ -70,6 +116,44 @@ def tessellatedAreas(images, counts):
             yield (x1, y1, x2, y2)
 
 
+def areasMask(images, areas):
+    """
+    Mask builder: True within any of the given rectangles.
+
+    :param images: images the mask will be applied to
+    :param areas: iterable of (x1, y1, x2, y2) boxes, as Pillow crop boxes
+    :return: boolean (H, W) array covering the overlap of the images
+    """
+    overlap = calculateOverlap(images)
+    mask = np.zeros((overlap[1], overlap[0]), dtype=bool)
+    for x1, y1, x2, y2 in areas:
+        mask[y1:y2, x1:x2] = True
+    return mask
+
+
+def polygonMask(images, vertices):
+    """
+    Mask builder: True within a polygon.
+
+    :param images: images the mask will be applied to
+    :param vertices: sequence of (x, y) vertices
+    :return: boolean (H, W) array covering the overlap of the images
+    """
+    canvas = Image.new("1", calculateOverlap(images))
+    ImageDraw.Draw(canvas).polygon([tuple(v) for v in vertices], fill=1)
+    return np.array(canvas)
+
+
+def subRegionMask(images):
+    return areasMask(images, selectSubRegion(images))
+
+
+def tessellatedMask(images, counts, rng=None):
+    """Mask builder: each tile of the tessellation is selected with even odds."""
+    rng = shared.pythonRandom(rng)
+    return areasMask(images, [area for area in tessellatedAreas(images, counts) if rng.choice([0, 1])])
+
+
 def wholeArea(images):
     yield [0, 0, *calculateOverlap(images)]
 
@@ -78,29 +162,60 @@ def _calculateTranscriptionAreas():
     pass
 
 
-def mutationRandomSwap(regions):
-    random.shuffle(regions)
+def mutationRandomSwap(regions, rng=None):
+    shared.pythonRandom(rng).shuffle(regions)
     return regions
 
 
-def mutationTranscription(regions, crosses=None):
+def _swapSegments(regions, positions):
+    """
+    Swap alternate [start:end] segments between two regions viewed as flat (N, channels) pixel buffers.  Each region is
+    converted to and from an array once, however many segments there are.
+
+    :param regions: pair of equally sized images
+    :param positions: sorted flat pixel positions, taken in (start, end) pairs
+    :return: pair of crossed images
+    """
+    shape = np.asarray(regions[0]).shape
+    buffers = [np.array(img).reshape(shape[0] * shape[1], -1) for img in regions[:2]]
+    for start, end in zip(positions[0::2], positions[1::2]):
+        segment = buffers[0][start:end].copy()
+        buffers[0][start:end] = buffers[1][start:end]
+        buffers[1][start:end] = segment
+    return [Image.fromarray(buffer.reshape(shape)) for buffer in buffers]
+
+
+def mutationTranscription(regions, crosses=None, flat=True, rng=None):
+    """
+    Transcription crossover: both regions are read as a single line of pixels and segments between crossover
+    positions are swapped.
+
+    :param regions: pair of equally sized images
+    :param crosses: expected number of crossovers, random (1-7) if None
+    :param flat: swap segments between flat pixel buffers.  If False, use the original crop/paste of each segment as
+                 up to three rectangles.
+    :param rng: random.Random, numpy Generator or seed, None for the random module
+    :return: pair of crossed images
+    """
     # print(regions)
     width, height = regions[0].size
     pixelCount = width * height
 
+    rng = shared.pythonRandom(rng)
     if crosses is None:
-        crossoverChance = random.randint(1, 7) / pixelCount
+        crossoverChance = rng.randint(1, 7) / pixelCount
     else:
         crossoverChance = crosses / pixelCount
 
-    pair = [img.copy() for img in regions[:2]]
-
-    crossoverPositions = []
-    for i in range(pixelCount):
-        if random.random() < crossoverChance:
-            crossoverPositions.append((i, i // width, i % width))
+    crossoverPositions = [(i, i // width, i % width)
+                          for i in shared.randomCrossoverPositions(pixelCount, crossoverChance, rng)]
     crossoverPositions.append((pixelCount, height - 1, width - 1))
 
+    if flat:
+        return _swapSegments(regions, [i for i, row, col in crossoverPositions])
+
+    pair = [img.copy() for img in regions[:2]]
+
     # print(crossoverPositions)
     for i in range(len(crossoverPositions) // 2):
         (iStart, rowStart, colStart), (iEnd, rowEnd, colEnd) = crossoverPositions[:2]
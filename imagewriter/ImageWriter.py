@@ -0,0 +1,77 @@
+"""
+Write images in the background while the next generation is bred.
+
+Writes are queued to a thread pool: PNG compression and BMP encoding spend most of their time outside the GIL.  The
+queue is bounded, so submitting blocks once too many images are waiting, capping the memory held by pending writes.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+
+
+class ImageWriter:
+    def __init__(self, workers=2, maxPending=None):
+        """
+        :param workers: number of writer threads
+        :param maxPending: most writes queued or in progress before submit blocks, twice the workers if None
+        """
+        if maxPending is None:
+            maxPending = 2 * workers
+        self._executor = ThreadPoolExecutor(workers)
+        self._slots = threading.BoundedSemaphore(maxPending)
+        self._lock = threading.Lock()
+        self._futures = []
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue func(*args, **kwargs), blocking while the queue is full.  Anything passed must not be modified until it
+        has been written.
+
+        :return: Future of the write
+        """
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        with self._lock:
+            self._futures.append(future)
+        return future
+
+    def save(self, img, filename, **params):
+        """Queue Image.save."""
+        return self.submit(img.save, filename, **params)
+
+    def writeBMP(self, bmp, filename, res=24):
+        """Queue Bitmap.writeBMP."""
+        return self.submit(bmp.writeBMP, filename, res)
+
+    def flush(self):
+        """
+        Wait for every queued write to finish.
+
+        :raise: the first exception raised by a write since the last flush
+        """
+        with self._lock:
+            futures, self._futures = self._futures, []
+        wait(futures)
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        if errors:
+            raise errors[0]
+
+    def close(self):
+        """Flush and stop the writer threads."""
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.close()
+        else:  # Let the exception that ended the block propagate, not a failed write
+            self._executor.shutdown()
@@ -0,0 +1,188 @@
+"""
+Island model evolution: several sub-populations, each evolved by its own worker process, which periodically swap their
+fittest individuals.
+
+Each island is a Population in shared memory.  Workers attach to their island by name, breed it for a number of
+generations in place and report its scores.  Migration then copies the fittest of each island over the least fit of
+its neighbours, block to block, without images passing through a pipe.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+import numpy as np
+
+from bitmap import bitmap, crosser
+from fitness import Fitness
+from imagecrosser import ImageCrosser
+from patternedimage import PatternedImage
+from population import Population
+from shared import shared
+
+
+def _crossTessellated(parents, out, rng):
+    mask = ImageCrosser.tessellatedMask(parents, counts=(rng.randint(2, 5), rng.randint(2, 5)), rng=rng)
+    ImageCrosser.crossMaskedArrays(parents, mask, out=out)
+
+
+def _crossWholeArea(parents, out, rng):
+    children = ImageCrosser.crossWholeArea([Image.fromarray(parent) for parent in parents],
+                                           mutations=[ImageCrosser.mutationTranscription], rng=rng)
+    for child, slot in zip(children, out):
+        slot[...] = np.asarray(child)
+
+
+def _crossTranscribed(parents, out, rng):
+    dims = (parents[0].shape[1], parents[0].shape[0])
+    pair = [bitmap.Bitmap(dims, parent) for parent in parents]
+    fit = crosser.FullImageTranscriber.multiple(*pair, crossoverChance=rng.randint(1, 7) / (dims[0] * dims[1]),
+                                                rng=rng)
+    for child, slot in zip(fit.transcribe(), out):
+        slot[...] = child.array
+
+
+CROSSERS = {"tessellated": _crossTessellated, "wholeArea": _crossWholeArea, "transcribed": _crossTranscribed}
+
+
+def ringTopology(island, islandCount):
+    """Each island receives migrants from the one before it."""
+    return [(island - 1) % islandCount]
+
+
+def completeTopology(island, islandCount):
+    """Each island receives migrants from every other island."""
+    return [i for i in range(islandCount) if i != island]
+
+
+TOPOLOGIES = {"ring": ringTopology, "complete": completeTopology}
+
+
+def _breedIsland(island, scores, cross, rng):
+    """Breed the next generation of an island from tournament picked pairs.  An odd slot out takes the fittest."""
+    children = island.next
+    for i, (a, b) in enumerate(Fitness.selectSets(scores, len(island) // 2, rng=rng)):
+        cross([island[a], island[b]], children[2 * i:2 * i + 2], rng)
+    if len(island) % 2:
+        children[-1] = island[int(np.argmax(scores))]
+
+
+def _seedIsland(names, size, dims, rng):
+    """Worker: fill an island's current generation with new patterned images."""
+    island = Population.Population.attach(names, size, dims)
+    try:
+        for slot in island.current:
+            slot[...] = np.asarray(PatternedImage.new(dims=dims, rng=rng).convert("RGB"))
+    finally:
+        island.close()
+
+
+def _evolveIsland(names, size, dims, generations, rng, crossName, fitness):
+    """
+    Worker: evolve an island for a number of generations.
+
+    :param rng: the island's substream for this epoch, see shared.spawnRandom
+    :return: the island's (current, next) block names after its swaps, and the scores of its current generation
+    """
+    island = Population.Population.attach(names, size, dims)
+    try:
+        for generation in range(generations):
+            _breedIsland(island, fitness(island.current), CROSSERS[crossName], rng)
+            island.swap()
+        return island.names, [float(s) for s in fitness(island.current)]
+    finally:
+        island.close()
+
+
+class IslandModel:
+    def __init__(self, islandCount, dims, islandSize=10, migrationInterval=5, migrants=1, topology="ring",
+                 crossName="tessellated", fitness=Fitness.score, processes=None, gen0=None, rng=None):
+        """
+        :param islandCount: number of islands
+        :param dims: (width, height) of every image
+        :param islandSize: individuals per island
+        :param migrationInterval: generations bred between migrations
+        :param migrants: fittest individuals each island sends to each of its neighbours
+        :param topology: name from TOPOLOGIES, or function of (island, islandCount) returning the islands it receives
+                         migrants from
+        :param crossName: crosser from CROSSERS
+        :param fitness: scorer, see Fitness.  Must be a module level function so workers can receive it.
+        :param processes: worker processes, one per island if None, 1 to run every island in this process
+        :param gen0: optional islandCount * islandSize images or arrays for the first generation, island by island
+        :param rng: random.Random, numpy Generator or seed, None for the random module.  Each island gets its own
+                    substream every epoch.
+        """
+        if crossName not in CROSSERS:
+            msg = "Unknown crosser: {}".format(crossName)
+            raise ValueError(msg)
+        self.dims = tuple(dims)
+        self.islandSize = islandSize
+        self.migrationInterval = migrationInterval
+        self.migrants = migrants
+        self.topology = TOPOLOGIES[topology] if isinstance(topology, str) else topology
+        self.crossName = crossName
+        self.fitness = fitness
+        self.scores = None
+        self.rng = shared.pythonRandom(rng)
+
+        if processes is None:
+            processes = islandCount
+        self._executor = ProcessPoolExecutor(processes) if processes > 1 else None
+        self.islands = [Population.Population(islandSize, self.dims) for i in range(islandCount)]
+        if gen0 is None:
+            self._map(_seedIsland, [island.names for island in self.islands], [islandSize] * islandCount,
+                      [self.dims] * islandCount, self._streams())
+        else:
+            for i, img in enumerate(gen0):
+                self.islands[i // islandSize].current[i % islandSize] = \
+                    np.asarray(img.convert("RGB")) if isinstance(img, Image.Image) else img
+
+    def _map(self, func, *iterables):
+        return list(self._executor.map(func, *iterables) if self._executor else map(func, *iterables))
+
+    def _streams(self):
+        """Substreams for each island's worker, drawn here so results do not depend on how islands share processes."""
+        return shared.spawnRandom(self.rng, len(self.islands))
+
+    def _migrate(self):
+        """Copy the fittest of each island over the least fit individuals of the islands it feeds."""
+        islandCount = len(self.islands)
+        emigrants = [island.current[np.argsort(scores, kind="stable")[::-1][:self.migrants]]
+                     for island, scores in zip(self.islands, self.scores)]
+        for i, (island, scores) in enumerate(zip(self.islands, self.scores)):
+            incoming = np.concatenate([emigrants[j] for j in self.topology(i, islandCount)])[:len(island) - 1]
+            island.current[np.argsort(scores, kind="stable")[:len(incoming)]] = incoming
+
+    def evolve(self, epochs):
+        """
+        Breed every island for migrationInterval generations, then migrate, epochs times.
+
+        :return: generator of the epoch index, after each migration
+        """
+        islandCount = len(self.islands)
+        for epoch in range(epochs):
+            results = self._map(_evolveIsland, [island.names for island in self.islands],
+                                [self.islandSize] * islandCount, [self.dims] * islandCount,
+                                [self.migrationInterval] * islandCount, self._streams(),
+                                [self.crossName] * islandCount, [self.fitness] * islandCount)
+            self.scores = []
+            for island, (names, scores) in zip(self.islands, results):
+                island.adopt(names)
+                self.scores.append(scores)
+            self._migrate()
+            yield epoch
+
+    def best(self):
+        """:return: copy of the fittest individual as scored at the last migration"""
+        island = max(range(len(self.islands)), key=lambda i: max(self.scores[i]))
+        return self.islands[island].current[int(np.argmax(self.scores[island]))].copy()
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown()
+        for island in self.islands:
+            island.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
@@ -2,32 +2,60 @@
 Create a new generation from a couple of bitmaps.
 """
 from bitmap import bitmap, crosser
+from checkpoint import Checkpoint
+from imagewriter import ImageWriter
 
+import argparse
 import datetime
 import itertools
 import os
 import random
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resume", metavar="FOLDER",
+                        help="generation folder of a run to resume from its latest checkpoint")
+    parser.add_argument("--checkpoint-interval", type=int, default=5, metavar="N",
+                        help="checkpoint every N generations")
+    parser.add_argument("--seed", type=int, help="seed for a reproducible run")
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+
     dims = (540, 540)
-    print("Generating generation 0")
-    breeder = crosser.CrosserMonogamous(dims=dims)
+    if args.resume:
+        folder = args.resume
+        latest = Checkpoint.latest(os.path.join(folder, "checkpoints"))
+        if latest is None:
+            parser.error("no checkpoint in {}".format(folder))
+        genID, arrays, params = Checkpoint.load(latest, rng=rng)
+        print("Resuming after generation {}".format(genID))
+        breeder = crosser.CrosserMonogamous.fromCheckpointArrays(arrays, processes=os.cpu_count(), rng=rng, **params)
+        genID += 1
+    else:
+        print("Generating generation 0")
+        breeder = crosser.CrosserMonogamous(dims=dims, processes=os.cpu_count(), rng=rng)
 
-    now = datetime.datetime.now()
-    folder = now.strftime("generations\%Y%m%d_%H%M%S")
-    os.mkdir(folder)
+        now = datetime.datetime.now()
+        folder = now.strftime("generations\%Y%m%d_%H%M%S")
+        os.mkdir(folder)
+        genID = 0
+    params = {"breedPatternParams": breeder.breedPatternParams}
 
-    genID = 0
-    for generation in breeder:
-        count = 0
-        print("Writing generation {}: ".format(genID), end='')
-        for bmp in generation:
-            count += 1
-            print("{}, ".format(count), end='')
-            bmp.writeBMP("{}\gen{}_{}".format(folder, genID, count))
-        genID += 1
-        if genID > 23:
-            break
+    with ImageWriter.ImageWriter(workers=os.cpu_count()) as writer:
+        for generation in breeder:
+            count = 0
+            print("Writing generation {}: ".format(genID), end='')
+            for bmp in generation:
+                count += 1
+                print("{}, ".format(count), end='')
+                writer.writeBMP(bmp, "{}\gen{}_{}".format(folder, genID, count))
+            if genID % args.checkpoint_interval == 0:
+                writer.flush()  # a resumed run will not write this generation again
+                Checkpoint.save(os.path.join(folder, "checkpoints"), genID, breeder.checkpointArrays(generation),
+                                params, rng=rng)
+            genID += 1
+            if genID > 23:
+                break
 
     # for genID in range(1, 12):  # 10 images per row, 6 rows per contact sheet
     #     genNext = []
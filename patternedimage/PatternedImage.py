@@ -6,7 +6,8 @@ from PIL import Image
 import numpy as np
 
 import json
-import random
+import os
+import tempfile
 
 from shared import shared
 from vector import vector
@@ -33,135 +34,95 @@ def _parseColoursList(colours=None):
         return [shared.fillOutTuple(c, 3) for c in colours]
 
 
-def new(pattern=None, dims=(1080, 1080), colours=None, **kwargs):
+def new(pattern=None, dims=(1080, 1080), colours=None, rng=None, **kwargs):
     """
     Generate a new Image with a pattern.  Assume that all patterns are generated
 
+    :param rng: random.Random, numpy Generator or seed for every random choice, None for the random module.
     :return: an Image with a pattern conforming to the requested.
     """
+    rng = shared.pythonRandom(rng)
 
     if pattern is None:  # Return arbitrary pattern
-        f = random.choice([checkerboard, diamonds, gaussian, gradient, striped, stripedMulti])
+        f = rng.choice([checkerboard, diamonds, gaussian, gradient, striped, stripedMulti])
         if f == stripedMulti:
-            colours = shared.randomRGBContrasting(random.randint(3, 7))
+            colours = shared.randomRGBContrasting(rng.randint(3, 7), rng)
         elif f == gaussian:
-            choice = random.randrange(4)
+            choice = rng.randrange(4)
             if choice == 0:
                 colours = [(0, 0, 0), (255, 255, 255)]
             elif choice == 1:
                 colours = [(255, 255, 255), (0, 0, 0)]
             else:
-                colours = shared.randomRGBContrasting(2)
+                colours = shared.randomRGBContrasting(2, rng)
         elif colours is None:
-            if random.choice([0, 1]):
-                colours = shared.randomRGBContrasting(2)
+            if rng.choice([0, 1]):
+                colours = shared.randomRGBContrasting(2, rng)
             else:
-                colours = shared.randomRGBPair()
+                colours = shared.randomRGBPair(rng)
     else:
         f = pattern
 
     # return Image.new(mode="RGB", size=dims, color=colours[0])
-    return f(dims=dims, colours=colours, **kwargs)
+    return f(dims=dims, colours=colours, rng=rng, **kwargs)
 
 
-def checkerboard(dims, colours=[0, 255], checksize=None):
+def checkerboard(dims, colours=[0, 255], checksize=None, rng=None):
     if checksize is None:
+        rng = shared.pythonRandom(rng)
         minCheckSize = max(4, min(dims) // 128)
         maxCheckSize = min(dims) // 5
-        checksize = random.randint(minCheckSize, maxCheckSize)
+        checksize = rng.randint(minCheckSize, maxCheckSize)
     cols = _parseColoursList(colours)[:2]
-    img = Image.new(mode="RGB", size=dims, color=cols[1])
+    palette = np.array([cols[1], cols[0]], dtype=np.uint8)
 
     xmax, ymax = dims
-    for y in range(ymax):
-        for x in range(xmax):
-            if ((x % (2 * checksize)) >= checksize) ^ ((y % (2 * checksize)) >= checksize):
-                img.putpixel((x, y), cols[0])
-    return img
+    ys, xs = np.indices((ymax, xmax))
+    checks = ((xs % (2 * checksize)) >= checksize) ^ ((ys % (2 * checksize)) >= checksize)
+    return Image.fromarray(palette[checks.astype(np.uint8)])
 
 
-def diamonds(dims, colours=[0, 255], angles=None, sizes=None):
+def diamonds(dims, colours=[0, 255], angles=None, sizes=None, rng=None):
+    rng = shared.pythonRandom(rng)
     if angles is None:
-        angle1 = random.randint(0, 89)
-        angles = (angle1, angle1 + random.randint(15, 104))
+        angle1 = rng.randint(0, 89)
+        angles = (angle1, angle1 + rng.randint(15, 104))
     vUnitH, vUnitV = shared._diamondVectors(angles)
     vOrigin = vector.Vector(vector.radialIntersection(dims, vUnitH.phaseAngle()))
 
     if sizes is None:
-        sizes = (random.randint(3, dims[0] // 4), random.randint(3, dims[1] // 4))
+        sizes = (rng.randint(3, dims[0] // 4), rng.randint(3, dims[1] // 4))
     sizeH, sizeV = shared.fillOutList(sizes, 2)
 
     cols = _parseColoursList(colours)[:2]
-    img = Image.new(mode="RGB", size=dims, color=cols[1])
 
-    xmax, ymax = dims
-    for y in range(ymax):
-        for x in range(xmax):
-            vPosition = vector.Vector2D([x, y]) - vOrigin
-
-            distanceAlongHorizontal = vector.dotProduct(vPosition, vUnitH)
-            distanceAlongVertical = vector.dotProduct(vPosition, vUnitV)
-            distThroughPatternHorizontal = distanceAlongHorizontal % (2 * sizeH)
-            distThroughPatternVertical = distanceAlongVertical % (2 * sizeV)
-
-            if (distThroughPatternHorizontal < sizeH) ^ (distThroughPatternVertical >= sizeV):
-                baseColour = cols[0]
-                mixColour = cols[1]
-            else:
-                baseColour = cols[1]
-                mixColour = cols[0]
-
-            mixRateH = [1]
-            if distThroughPatternHorizontal < 1:
-                mixRateH = [1 - distThroughPatternHorizontal, distThroughPatternHorizontal]
-            elif sizeH < distThroughPatternHorizontal < sizeH + 1:
-                distIntoNextColour = distThroughPatternHorizontal - sizeH
-                mixRateH = [1 - distIntoNextColour, distIntoNextColour]
-
-            mixRateV = [1]
-            if distThroughPatternVertical < 1:
-                mixRateV = [1 - distThroughPatternVertical, distThroughPatternVertical]
-            elif sizeV < distThroughPatternVertical < sizeV + 1:
-                distIntoNextColour = distThroughPatternVertical - sizeV
-                mixRateV = [1 - distIntoNextColour, distIntoNextColour]
-
-            # First implementation : Mix proportions as if diamonds are square: this might make points ill-defined!
-            # Probably should add some kind of cos theta element.
-            proportions = [pH * pV for pH in mixRateH for pV in mixRateV]
-
-            # print("{} = {}".format(proportions, sum(proportions)))
-            if len(proportions) == 1:
-                c = baseColour
-            if len(proportions) == 2:
-                c = shared.rgbBlend(baseColour, mixColour, proportions[0])
-            if len(proportions) == 4:
-                c = shared.rgbBlend(baseColour, mixColour, proportions[0] + proportions[3])
-            img.putpixel((x, y), c)
-    return img
-
-
-def gradient(dims, colours=[0, 255], angle=None):
+    distanceH = shared.distanceAlong(dims, vOrigin, vUnitH)
+    distanceV = shared.distanceAlong(dims, vOrigin, vUnitV)
+    # First implementation : Mix proportions as if diamonds are square: this might make points ill-defined!
+    # Probably should add some kind of cos theta element.
+    baseIsFirst, proportions = shared._diamondMixRates(distanceH, distanceV, sizeH, sizeV)
+
+    colour1, colour2 = np.array(cols, dtype=float)
+    baseColours = np.where(baseIsFirst[..., np.newaxis], colour1, colour2)
+    mixColours = np.where(baseIsFirst[..., np.newaxis], colour2, colour1)
+    return Image.fromarray(shared.rgbBlendArray(baseColours, mixColours, proportions))
+
+
+def gradient(dims, colours=[0, 255], angle=None, rng=None):
     if angle is None:
-        angle = random.randint(-87, 83)
+        angle = shared.pythonRandom(rng).randint(-87, 83)
 
     vUnit = vector.Vector2D.unit(angle)
     vOrigin = vector.Vector(vector.radialIntersection(dims, angle - 180))
     vTerminus = vector.Vector(vector.radialIntersection(dims, angle))
     distanceTotal = (vTerminus - vOrigin).magnitude()
     cols = _parseColoursList(colours)[:2]
-    img = Image.new(mode="RGB", size=dims, color=cols[0])
 
-    xmax, ymax = dims
-    for y in range(ymax):
-        for x in range(xmax):
-            vPosition = vector.Vector2D([x, y]) - vOrigin
-            distanceAlongDirection = vector.dotProduct(vPosition, vUnit)
-            colour = shared.rgbBlend(*cols, distanceAlongDirection / distanceTotal)
-            img.putpixel((x, y), colour)
-    return img
+    distances = shared.distanceAlong(dims, vOrigin, vUnit)
+    return Image.fromarray(shared.rgbBlendArray(*cols, distances / distanceTotal))
 
 
-def striped(dims=(1080, 1080), colours=[0, 255], stripewidth=None, angle=None):
+def striped(dims=(1080, 1080), colours=[0, 255], stripewidth=None, angle=None, rng=None):
     """
     :param dims:
     :param colours:
@@ -169,40 +130,25 @@ def striped(dims=(1080, 1080), colours=[0, 255], stripewidth=None, angle=None):
     """
 
     cols = _parseColoursList(colours)
+    rng = shared.pythonRandom(rng)
 
-    img = Image.new(mode="RGB", size=dims, color=cols[0])
     if stripewidth is None:
         maxstripewidth = min(dims) // 3
-        stripewidth = random.randint(5, maxstripewidth)
+        stripewidth = rng.randint(5, maxstripewidth)
 
     if angle is None:
-        angle = random.randint(-87, 83)
+        angle = rng.randint(-87, 83)
 
     vUnit = vector.Vector2D.unit(angle)
     vOrigin = vector.Vector(vector.radialIntersection(dims, angle - 180))
     # print("{}: {}".format(vUnit, vOrigin))
 
-    xmax, ymax = dims
-    colour1 = cols[0]
-    colour2 = cols[1]
-    for y in range(ymax):
-        for x in range(xmax):
-            vPosition = vector.Vector2D([x, y]) - vOrigin
-            distanceAlongDirection = vector.dotProduct(vPosition, vUnit)
-            distancethroughPattern = distanceAlongDirection % (2 * stripewidth)
-            if distancethroughPattern < 1:
-                c = shared.rgbBlend(colour2, colour1, distancethroughPattern)
-            elif stripewidth - 1 < distancethroughPattern < stripewidth:
-                c = shared.rgbBlend(colour2, colour1, stripewidth - distancethroughPattern)
-            elif distancethroughPattern >= stripewidth:
-                c = colour2
-            else:
-                c = colour1
-            img.putpixel((x, y), c)
-    return img
+    distances = shared.distanceAlong(dims, vOrigin, vUnit)
+    proportions = shared._stripeProportions(distances, stripewidth)
+    return Image.fromarray(shared.rgbBlendArray(cols[1], cols[0], proportions))
 
 
-def stripedMulti(dims=(1080, 1080), colours=[0, 255], stripewidth=None, angle=None):
+def stripedMulti(dims=(1080, 1080), colours=[0, 255], stripewidth=None, angle=None, rng=None):
     """
     Multicolour stripes.  Can't figure out why interpolation doesn't work so interpolation is disabled.
     :param dims:
@@ -212,49 +158,26 @@ def stripedMulti(dims=(1080, 1080), colours=[0, 255], stripewidth=None, angle=No
 
     cols = _parseColoursList(colours)
     colourCount = len(cols)
+    rng = shared.pythonRandom(rng)
 
-    img = Image.new(mode="RGB", size=dims, color=cols[0])
     if stripewidth is None:
         maxstripewidth = min(dims) // (colourCount + 1)
-        stripewidth = random.randint(5, maxstripewidth)
+        stripewidth = rng.randint(5, maxstripewidth)
 
     if angle is None:
-        angle = random.randint(-87, 83)
-
-    # angle = 0
-    # stripewidth = 26.6
+        angle = rng.randint(-87, 83)
 
     vUnit = vector.Vector2D.unit(angle)
     vOrigin = vector.Vector(vector.radialIntersection(dims, angle - 180))
     # print("{}: {}".format(vUnit, vOrigin))
 
-    xmax, ymax = dims
-    colour1 = cols[0]
-    colour2 = cols[1]
-    colourCount = len(cols)
     patternLength = colourCount * stripewidth
-    for y in range(ymax):
-        for x in range(xmax):
-            vPosition = vector.Vector2D([x, y]) - vOrigin
-            distanceAlongDirection = vector.dotProduct(vPosition, vUnit)
-            distanceThroughPattern = distanceAlongDirection % patternLength
-            distanceAcrossStripe = distanceThroughPattern % stripewidth
-            colourIndex = int(distanceThroughPattern / stripewidth)
-            colour0 = cols[(colourIndex - 1) % colourCount]
-            colour1 = cols[colourIndex]
-            colour2 = cols[(colourIndex + 1) % colourCount]
-
-            # if distanceAcrossStripe < 1:
-            #     c = shared.rgbBlend(colour0, colour1, distanceAcrossStripe)
-            # elif stripewidth - 1 < distanceAcrossStripe:
-            #     c = shared.rgbBlend(colour1, colour2, stripewidth - distanceAcrossStripe)
-            # # elif distanceAcrossStripe >= stripewidth:
-            # #     c = colour2
-            # else:
-            #     c = colour1
-            c = colour1
-            img.putpixel((x, y), c)
-    return img
+    distanceThroughPattern = np.remainder(shared.distanceAlong(dims, vOrigin, vUnit), patternLength)
+    colourIndices = (distanceThroughPattern / stripewidth).astype(np.intp)
+    np.clip(colourIndices, 0, colourCount - 1, out=colourIndices)  # Guard against rounding at the pattern end
+
+    palette = np.array(cols, dtype=np.uint8)
+    return Image.fromarray(palette[colourIndices])
 
 
 def _generateGaussianFilename(dims, colours):
@@ -263,7 +186,7 @@ def _generateGaussianFilename(dims, colours):
     return "gaussians/{0}x{1}/{0}x{1}_{2},{3},{4}_{5},{6},{7}".format(*ds, *colours[0], *colours[1])
 
 
-def _generateGaussianDistributionFilename(dims, mus=None, sigmas=None, index=0):
+def _generateGaussianDistributionFilename(dims, mus=None, sigmas=None, index=0, extension="json"):
     if mus is None:
         musDesc = ""
     else:
@@ -274,20 +197,24 @@ def _generateGaussianDistributionFilename(dims, mus=None, sigmas=None, index=0):
     else:
         sigmasDesc = "_σs({},{})".format(*sigmas)
 
-    return "{}x{}{}{}_{}.json".format(*dims[:2], musDesc, sigmasDesc, index)
+    return "{}x{}{}{}_{}.{}".format(*dims[:2], musDesc, sigmasDesc, index, extension)
 
 
-def _generate2DGaussianDistribution(dims, mus=None, sigmas=None, deltaCount=100):
+def _generate2DGaussianDistribution(dims, mus=None, sigmas=None, deltaCount=100, rng=None):
     """
     Generate a statistically normal distribution.  Take small steps from zero to one so that this can be mapped onto a
     colour difference.
 
+    Samples are drawn in large blocks and accumulated per pixel; the draw that takes the first pixel to one ends the
+    distribution, exactly as if the samples had been taken one at a time.
+
     :param dims: Dimensions of the image
     :param mus: Position of mu of normal distribution: essentially the [x, y] coordinate of the centre of the 2D
                 distribution.
     :param sigmas: Standard deviation of the distribution - essentially the width of the 'dot'.
     :param deltaCount:  No of steps.
-    :return: A list of lists of normalised probability values conforming to the distribution.
+    :param rng: numpy Generator, random.Random or seed, None for the random module, see shared.numpyRandom.
+    :return: A 2D array (rows of columns) of normalised probability values conforming to the distribution.
     """
     xmax, ymax = dims
     if mus:
@@ -302,66 +229,139 @@ def _generate2DGaussianDistribution(dims, mus=None, sigmas=None, deltaCount=100)
         xsigma = xmax / 4
         ysigma = ymax / 4
 
-    delta = 1 / deltaCount
-
-    values = [[0.0] * xmax for i in range(ymax)]
+    rng = shared.numpyRandom(rng)
+    blockSize = shared._gaussianBlockSize(deltaCount, (xsigma, ysigma))
+    counts = np.zeros(xmax * ymax, dtype=np.int64)
 
     terminalReached = False
     while not terminalReached:
-        x = round(random.gauss(xmu, xsigma))
-        y = round(random.gauss(ymu, ysigma))
-        if 0 <= x < xmax and 0 <= y < ymax:
-            values[y][x] += delta
-            if values[y][x] >= 1.0:
-                values[y][x] = 1.0
-                terminalReached = True
+        indices, inside = shared._gaussianCoordinates(rng, blockSize, (xmu, ymu), (xsigma, ysigma), dims)
+        indices = indices[inside]
+        crossing = shared._firstThresholdCrossing(counts, indices, deltaCount)
+        if crossing is not None:
+            indices = indices[:crossing + 1]
+            terminalReached = True
+        counts += np.bincount(indices, minlength=counts.size)
+
+    return np.minimum(counts / deltaCount, 1.0).reshape(ymax, xmax)
+
+
+def _gaussianDistributionFolder(dims, root="gaussiandists"):
+    return pathlib.Path(root) / "{}x{}".format(*dims[:2])
+
 
-    return values
+def _loadGaussianDistribution(filepath):
+    """
+    Memory map a stored distribution.  Nothing is parsed or copied; pages are shared between processes that load the
+    same file.
+
+    :param filepath: path of a .npy distribution
+    :return: read-only float32 array of the distribution
+    """
+    return np.load(filepath, mmap_mode='r')
 
 
-def _get6DGaussianDistribution(dims):
-    """Assume default mus and sigmas for now."""
-    fileCount = 10  # number of json files stored
+def _saveGaussianDistribution(filepath, dist):
+    """
+    Store a distribution as float32 .npy.  Written to a temporary file first so that concurrent readers never see a
+    partial file.
+
+    :param filepath: path of the .npy distribution
+    :param dist: 2D distribution (list of lists or array)
+    """
+    filepath = pathlib.Path(filepath)
+    os.replace(_writeTemporaryDistribution(filepath.parent, dist), filepath)
+
+
+def _writeTemporaryDistribution(folder, dist):
+    """:return: path of a uniquely named temporary file in folder holding dist as float32 .npy"""
+    handle, temporary = tempfile.mkstemp(suffix=".tmp", dir=folder)
+    with os.fdopen(handle, "wb") as target:
+        np.save(target, np.asarray(dist, dtype=np.float32))
+    return temporary
+
+
+def _addGaussianDistribution(folder, dims, dist):
+    """
+    Store a distribution under the next free index in its folder.  Hard linking fails rather than overwriting, so
+    concurrent writers that chose the same index move on to the next one instead of replacing each other's files.
+
+    :return: path of the .npy distribution
+    """
+    temporary = _writeTemporaryDistribution(folder, dist)
+    try:
+        index = len(list(pathlib.Path(folder).glob("*.npy")))
+        while True:
+            filepath = pathlib.Path(folder) / _generateGaussianDistributionFilename(dims, index=index, extension="npy")
+            try:
+                os.link(temporary, filepath)
+                return filepath
+            except FileExistsError:
+                index += 1
+    finally:
+        os.unlink(temporary)
+
+
+def convertGaussianDistributions(folder="gaussiandists"):
+    """
+    Convert stored JSON distributions into the binary store.  Each .npy is written alongside its .json; existing
+    binaries are left untouched.
+
+    :param folder: folder to search (recursively) for .json distributions
+    :return: list of paths of the .npy files written
+    """
+    written = []
+    for source in sorted(pathlib.Path(folder).glob("**/*.json")):
+        target = source.with_suffix(".npy")
+        if not target.exists():
+            with source.open(encoding="UTF-8") as s:
+                _saveGaussianDistribution(target, json.load(s))
+            written.append(target)
+    return written
+
+
+_convertedFolders = set()  # folders convertGaussianDistributions has already run on in this process
+
+
+def _get6DGaussianDistribution(dims, rng=None):
+    """
+    Assume default mus and sigmas for now.
+
+    :param rng: random.Random for choosing and orienting distributions, None for the random module
+
+    :return: (H, W, 3) float32 array holding one distribution per channel.
+    """
+    fileCount = 10  # number of distributions stored
     xmax, ymax = dims
-    foldername = "gaussiandists/{}x{}/".format(xmax, ymax)
-    p = pathlib.Path(foldername)
+    p = _gaussianDistributionFolder(dims)
     p.mkdir(parents=True, exist_ok=True)
+    if p not in _convertedFolders:
+        convertGaussianDistributions(p)
+        _convertedFolders.add(p)
 
-    dists = []
+    dists = np.empty((ymax, xmax, 3), dtype=np.float32)
+    rng = shared.pythonRandom(rng)
 
     for i in range(3):
-        fs = [f for f in p.iterdir() if f.is_file() and f.suffix == '.json']
-        choice = random.randrange(fileCount)
+        fs = sorted([f for f in p.iterdir() if f.is_file() and f.suffix == '.npy'])
+        choice = rng.randrange(fileCount)
         # print(fs)
         # print(choice)
         if choice < len(fs):
-            with fs[choice].open(encoding="UTF-8") as source:
-                dist = json.load(source)
+            dist = _loadGaussianDistribution(fs[choice])
         else:
-            dist = _generate2DGaussianDistribution(dims)
-            filepath = p / _generateGaussianDistributionFilename(dims, index=len(fs))
-            with filepath.open("w", encoding="UTF-8") as target:
-                json.dump(dist, target)
-        dists.append(shared.reorient(dist, random.randrange(8)))
+            dist = _generate2DGaussianDistribution(dims, rng=rng)
+            _addGaussianDistribution(p, dims, dist)
+        orientation = rng.randrange(8)
+        if xmax != ymax:  # Transposing a non-square distribution would no longer fit the image
+            orientation &= ~1
+        dists[:, :, i] = shared.reorientArray(dist, orientation)
 
-    return [list(zip(dists[0][i], dists[1][i], dists[2][i])) for i in range(ymax)]
+    return dists
 
 
-def gaussian(dims, colours=None):
+def gaussian(dims, colours=None, rng=None):
     """Assume default mus, sigmas and deltas for now."""
-    xmax, ymax = dims
-    dists = _get6DGaussianDistribution(dims)
-    # print(dists)
-    # for row in dists:
-    #     print(row)
+    dists = _get6DGaussianDistribution(dims, rng)
     cols = _parseColoursList(colours)
-    colourCount = len(cols)
-
-    img = Image.new(mode="RGB", size=dims, color=cols[0])
-    for y in range(ymax):
-        for x in range(xmax):
-            c = shared.rgbBlendPerChannel(cols[0], cols[1], dists[y][x])
-            img.putpixel((x, y), c)
-
-
-    return img
+    return Image.fromarray(shared.rgbBlendArray(cols[0], cols[1], dists))
@@ -0,0 +1,108 @@
+"""
+Hold a whole generation of images as one (N, H, W, 3) uint8 block in shared memory.
+
+Two blocks are kept: the current generation is read from while children are written into preallocated slots of the
+next, then the two are swapped.  Worker processes attach to the blocks by name and read parents in place, without
+pickling or copying them.
+"""
+from multiprocessing import shared_memory
+
+from PIL import Image
+import numpy as np
+
+
+class Population:
+    def __init__(self, count, dims, names=None):
+        """
+        :param count: number of images in a generation
+        :param dims: (width, height) of every image
+        :param names: (current, next) shared memory block names to attach to, None to create new blocks
+        """
+        self.count = count
+        self.dims = tuple(dims)
+        self.shape = (count, self.dims[1], self.dims[0], 3)
+        self.owner = names is None
+        if self.owner:
+            size = int(np.prod(self.shape))
+            self._blocks = [shared_memory.SharedMemory(create=True, size=size) for i in range(2)]
+        else:
+            self._blocks = [shared_memory.SharedMemory(name=name) for name in names]
+        self._buffers = [np.ndarray(self.shape, dtype=np.uint8, buffer=block.buf) for block in self._blocks]
+
+    @classmethod
+    def attach(cls, names, count, dims):
+        """Attach to a population created in another process, see names."""
+        return cls(count, dims, names=names)
+
+    @classmethod
+    def fromImages(cls, images):
+        """
+        Create a population and load the images into its current generation.
+
+        :param images: equally sized Images or (H, W, 3) arrays
+        """
+        arrays = [np.asarray(img.convert("RGB")) if isinstance(img, Image.Image) else img for img in images]
+        population = cls(len(arrays), (arrays[0].shape[1], arrays[0].shape[0]))
+        for slot, array in zip(population.current, arrays):
+            slot[...] = array
+        return population
+
+    @property
+    def names(self):
+        """(current, next) block names, in the order attach expects them."""
+        return tuple(block.name for block in self._blocks)
+
+    @property
+    def current(self):
+        """(N, H, W, 3) view of the current generation."""
+        return self._buffers[0]
+
+    @property
+    def next(self):
+        """(N, H, W, 3) view of the next generation, for children to be written into."""
+        return self._buffers[1]
+
+    def swap(self):
+        """Make the next generation current.  The old current block becomes the next one, to be overwritten."""
+        self._blocks.reverse()
+        self._buffers.reverse()
+
+    def adopt(self, names):
+        """
+        Take up the (current, next) order that another process attached to these blocks has swapped them into.
+
+        :param names: that process's names
+        """
+        if tuple(names) != self.names:
+            self.swap()
+
+    def images(self):
+        """Copy the current generation out as a list of Images."""
+        return [Image.fromarray(slot) for slot in self.current]
+
+    def close(self):
+        """
+        Release this process's mapping of the blocks, and free them if this population created them.  Views taken
+        from current, next or indexing must be dropped first.
+        """
+        self._buffers = []
+        for block in self._blocks:
+            block.close()
+            if self.owner:
+                block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def __getitem__(self, index):
+        return self.current[index]
+
+    def __iter__(self):
+        return iter(self.current)
+
+    def __len__(self):
+        return self.count
@@ -1,5 +1,7 @@
 from vector import vector
 
+import math
+import numpy as np
 import random
 
 from PIL import ImageColor
@@ -63,23 +65,95 @@ def normaliseProportions(proportions, count=2):
     return [p / total for p in props]
 
 
-def randomRGBContrasting(count=2):
-    hue1 = random.randint(0, 359)
+def pythonRandom(rng=None):
+    """
+    Resolve an rng argument to something with the random module's interface.
+
+    :param rng: random.Random, numpy Generator, int seed, or None for the random module itself
+    :return: the random module or a random.Random
+    """
+    if rng is None or rng is random or isinstance(rng, random.Random):
+        return random if rng is None else rng
+    if isinstance(rng, np.random.Generator):
+        return random.Random(int(rng.integers(2 ** 63)))
+    return random.Random(rng)
+
+
+def numpyRandom(rng=None):
+    """
+    Resolve an rng argument to a numpy Generator.  Unless one is given, the Generator is seeded from the Python stream,
+    so seeding the random module (or passing a random.Random) also fixes numpy's draws.
+
+    :param rng: numpy Generator, random.Random, int seed, or None for the random module
+    :return: numpy Generator
+    """
+    if isinstance(rng, np.random.Generator):
+        return rng
+    if rng is None or rng is random or isinstance(rng, random.Random):
+        return np.random.default_rng(pythonRandom(rng).getrandbits(64))
+    return np.random.default_rng(rng)
+
+
+def spawnRandom(rng, count):
+    """
+    Independent substreams, one per parallel worker, of the same kind as rng.  Generators are spawned through their
+    SeedSequence; Python streams are seeded with 64 bits drawn from rng.
+
+    :param rng: numpy Generator, random.Random, int seed, or None for the random module
+    :param count: number of substreams
+    :return: list of numpy Generators or random.Randoms
+    """
+    if isinstance(rng, np.random.Generator):
+        return rng.spawn(count)
+    rng = pythonRandom(rng)
+    return [random.Random(rng.getrandbits(64)) for i in range(count)]
+
+
+def randomCrossoverPositions(length, chance, rng=None):
+    """
+    Positions at which independent events of the given chance occur along a sequence.  Statistically the same as
+    testing random() < chance at every position, but the gaps between events are drawn from the geometric
+    distribution, so the cost scales with the number of events rather than the length.
+
+    :param length: length of the sequence
+    :param chance: probability of an event at each position
+    :param rng: random.Random to draw from, None for the random module, see pythonRandom
+    :return: sorted list of positions
+    """
+    rng = pythonRandom(rng)
+    if chance <= 0:
+        return []
+    if chance >= 1:
+        return list(range(length))
+
+    logFailure = math.log(1 - chance)
+    positions = []
+    position = int(math.log(1 - rng.random()) / logFailure)
+    while position < length:
+        positions.append(position)
+        position += 1 + int(math.log(1 - rng.random()) / logFailure)
+    return positions
+
+
+def randomRGBContrasting(count=2, rng=None):
+    rng = pythonRandom(rng)
+    hue1 = rng.randint(0, 359)
     hues = [(hue1 + i * 360 // count) % 360 for i in range(count)]
-    random.shuffle(hues)
+    rng.shuffle(hues)
     sats = [s * 100 // (count + 2) for s in range(1, count + 2)]
-    random.shuffle(sats)
-    values = [random.randint(0, 100) for i in range(count)]
+    rng.shuffle(sats)
+    values = [rng.randint(0, 100) for i in range(count)]
     return [ImageColor.getrgb("hsv({},{}%,{}%)".format(h, s, v)) for h, s, v in zip(hues, sats, values)]
 
 
-def randomRGBPair():
+def randomRGBPair(rng=None):
+    rng = pythonRandom(rng)
     colour1 = []
     colour2 = []
 
     for i in range(3):
-        channel1 = random.randint(0, 255)
-        channel2 = (channel1 + random.randint(16, 240)) % 256
+        channel1 = rng.randint(0, 255)
+        channel2 = (channel1 + rng.randint(16, 240)) % 256
         colour1.append(channel1)
         colour2.append(channel2)
 
@@ -110,6 +184,155 @@ def rgbBlendPerChannel(cA, cB, proportions):
     return tuple([round(a * (1 - p) + b * p) for a, b, p in zip(cA, cB, proportions)])
 
 
+def rgbBlendArray(cA, cB, proportions):
+    """
+    Array equivalent of rgbBlend/rgbBlendPerChannel: 0.0 = pure cA, 1.0 = pure cB.  Rounds as rgbBlend does.
+
+    :param cA: base colour tuple or (H, W, 3) array of colours
+    :param cB: mix colour tuple or (H, W, 3) array of colours
+    :param proportions: (H, W) array of proportions, or (H, W, 3) for per channel proportions
+    :return: (H, W, 3) uint8 array
+    """
+    props = np.clip(proportions, 0.0, 1.0)
+    if props.ndim == 2:
+        props = props[..., np.newaxis]
+    blended = np.asarray(cA, dtype=float) * (1 - props) + np.asarray(cB, dtype=float) * props
+    return np.rint(blended).astype(np.uint8)
+
+
+def distanceAlong(dims, vOrigin, vUnit):
+    """
+    Distance of every pixel along a unit vector, measured from an origin.  Equivalent to the dot product of
+    (position - origin) with the unit vector for each pixel.
+
+    :param dims: image dimensions (x, y)
+    :param vOrigin: origin of measurement
+    :param vUnit: unit vector giving the direction of measurement
+    :return: (H, W) float array
+    """
+    xmax, ymax = dims
+    xOrigin, yOrigin = tuple(vOrigin)[:2]
+    xUnit, yUnit = tuple(vUnit)[:2]
+    xs = (np.arange(xmax) - xOrigin) * xUnit
+    ys = (np.arange(ymax) - yOrigin) * yUnit
+    return xs[np.newaxis, :] + ys[:, np.newaxis]
+
+
+def _stripeProportions(distances, stripewidth, interpolated=True):
+    """
+    Vectorised stripe colouring.  Distances are wrapped into a two stripe pattern; the proportion returned is that of
+    the first stripe colour, blended against the second across the anti-aliased edges.
+
+    :param distances: (H, W) distances along the stripe direction
+    :param stripewidth: width of each stripe
+    :param interpolated: blend the stripe edges
+    :return: (H, W) array of proportions of the first stripe colour.
+    """
+    through = np.remainder(distances, 2 * stripewidth)
+    proportions = np.where(through >= stripewidth, 0.0, 1.0)
+    if interpolated:
+        trailingEdge = (stripewidth - 1 < through) & (through < stripewidth)
+        proportions = np.where(trailingEdge, stripewidth - through, proportions)
+        proportions = np.where(through < 1, through, proportions)
+    return proportions
+
+
+def _diamondMixRates(distanceH, distanceV, sizeH, sizeV):
+    """
+    Vectorised diamond colouring.  Both distance arrays are wrapped into the pattern and the anti-aliased edges are
+    blended as if the diamonds were square.
+
+    :param distanceH: (H, W) distances along the first diamond vector
+    :param distanceV: (H, W) distances along the second diamond vector
+    :param sizeH: size of diamond along the first vector
+    :param sizeV: size of diamond along the second vector
+    :return: tuple of (H, W) arrays: True where colour1 is the base colour; proportion of the mix colour.
+    """
+    throughH = np.remainder(distanceH, 2 * sizeH)
+    throughV = np.remainder(distanceV, 2 * sizeV)
+    baseIsFirst = (throughH < sizeH) ^ (throughV >= sizeV)
+
+    edgeH = (throughH < 1) | ((sizeH < throughH) & (throughH < sizeH + 1))
+    edgeV = (throughV < 1) | ((sizeV < throughV) & (throughV < sizeV + 1))
+    intoH = np.where(throughH < 1, throughH, throughH - sizeH)
+    intoV = np.where(throughV < 1, throughV, throughV - sizeV)
+
+    mixH = np.where(edgeH, 1 - intoH, 1.0)
+    mixV = np.where(edgeV, 1 - intoV, 1.0)
+    proportions = mixH * mixV + np.where(edgeH & edgeV, intoH * intoV, 0.0)
+    proportions[~(edgeH | edgeV)] = 0.0  # Away from the edges the base colour is used unmixed
+    return baseIsFirst, proportions
+
+
+def _gaussianBlockSize(hits, sigmas, lower=2 ** 10, upper=2 ** 22):
+    """
+    Number of samples worth drawing per block when sampling a 2D normal distribution until its peak cell has received
+    'hits' samples.  Aim for a handful of blocks: more blocks waste time in Python, larger blocks waste samples.
+
+    :param hits: number of samples the peak cell needs
+    :param sigmas: standard deviations (x, y) of the distribution
+    :return: block size
+    """
+    expected = hits * 2 * math.pi * sigmas[0] * sigmas[1]  # reciprocal of the peak density
+    return int(clipValue(expected // 4, lower, upper))
+
+
+def _gaussianCoordinates(rng, count, mus, sigmas, dims):
+    """
+    Draw a block of rounded 2D normal coordinates.
+
+    :param rng: numpy Generator
+    :param count: number of coordinates
+    :param mus: mean (x, y)
+    :param sigmas: standard deviations (x, y)
+    :param dims: image dimensions, used to flag coordinates that land inside the image
+    :return: tuple of arrays: flattened pixel index (row major) and whether the coordinate is within the image.
+    """
+    xs = np.rint(rng.normal(mus[0], sigmas[0], count))
+    ys = np.rint(rng.normal(mus[1], sigmas[1], count))
+    inside = (0 <= xs) & (xs < dims[0]) & (0 <= ys) & (ys < dims[1])
+    indices = np.where(inside, ys * dims[0] + xs, 0).astype(np.intp)
+    return indices, inside
+
+
+def _firstThresholdCrossing(counts, keys, thresholds):
+    """
+    Find the first draw in a block that takes its key's running count to its threshold.
+
+    :param counts: current count per key (not modified)
+    :param keys: block of keys, in the order drawn
+    :param thresholds: threshold as a single value or per key (same length as counts)
+    :return: index into keys of the first draw that reaches its threshold, or None if no draw does.
+    """
+    limits = np.asarray(thresholds)
+    if limits.ndim:
+        limits = limits[keys]
+    totals = counts + np.bincount(keys, minlength=len(counts))
+    if not np.any(totals[keys] >= limits):  # Cheap rejection: most blocks never reach a threshold
+        return None
+
+    order = np.argsort(keys, kind='stable')
+    sortedKeys = keys[order]
+    groupStarts = np.flatnonzero(np.r_[True, sortedKeys[1:] != sortedKeys[:-1]])
+    groupSizes = np.diff(np.r_[groupStarts, len(keys)])
+    ranks = np.empty(len(keys), dtype=np.intp)
+    ranks[order] = np.arange(len(keys)) - np.repeat(groupStarts, groupSizes)  # Occurrence number within the block
+
+    return np.flatnonzero(counts[keys] + ranks + 1 >= limits)[0]
+
+
+def _diamondSizes(sizeInfo):
+    """
+    Sizes of the tessellated parallelogram pattern.  Default to equal sizes if the second size is not provided.
+
+    :param sizeInfo: size information
+    :return: list pair of sizes.
+    """
+    if sizeInfo is None:
+        sizeInfo = 7
+    return fillOutList(sizeInfo, 2)
+
+
 def _diamondVectors(angleInfo):
     """
     Calculate the unit vectors for the tessellated parallelogram pattern.  Default to orthogonal if second angle is not
@@ -142,3 +365,17 @@ def reorient(list2d, orientation):
         return [list(reversed(row)) for row in list2d]
     else:
         return [list(row) for row in list2d]
+
+
+def reorientArray(array2d, orientation):
+    """
+    Array equivalent of reorient.  Uses transposes and reversed slices only, so the result is a view: nothing is
+    copied.
+    """
+    if orientation & 1:
+        array2d = array2d.T
+    if orientation & 2:
+        array2d = array2d[::-1]
+    if orientation & 4:
+        array2d = array2d[:, ::-1]
+    return array2d
@@ -0,0 +1,54 @@
+"""
+Test module for checkpointing runs.
+"""
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from checkpoint import Checkpoint
+
+
+class TestCheckpoint(unittest.TestCase):
+    def test_roundTrip(self):
+        population = np.arange(2 * 3 * 4 * 3, dtype=np.uint8).reshape(2, 3, 4, 3)
+        with tempfile.TemporaryDirectory() as folder:
+            random.seed(24)
+            Checkpoint.save(folder, 7, {"population": population}, {"setcount": 5}, compress=True)
+            expected = random.random()
+            generation, arrays, params = Checkpoint.load(Checkpoint.latest(folder))
+            self.assertEqual(expected, random.random())
+        self.assertEqual(7, generation)
+        self.assertEqual({"setcount": 5}, params)
+        self.assertTrue((population == arrays["population"]).all())
+
+    def test_roundTrip_generator(self):
+        rng = np.random.default_rng(25)
+        with tempfile.TemporaryDirectory() as folder:
+            Checkpoint.save(folder, 3, {}, rng=rng)
+            expected = rng.integers(2 ** 32, size=4)
+            resumed = np.random.default_rng()
+            Checkpoint.load(Checkpoint.latest(folder), rng=resumed)
+        self.assertTrue((expected == resumed.integers(2 ** 32, size=4)).all())
+
+    def test_seed_rejected(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with self.assertRaises(TypeError):
+                Checkpoint.save(folder, 3, {}, rng=25)
+
+    def test_save_keep(self):
+        with tempfile.TemporaryDirectory() as folder:
+            for generation in [1, 12, 3, 4]:
+                Checkpoint.save(folder, generation, {}, keep=2)
+            self.assertEqual(["checkpoint_000004.npz", "checkpoint_000012.npz"],
+                             [path.name for path in Checkpoint.checkpoints(folder)])
+            self.assertEqual("checkpoint_000012.npz", Checkpoint.latest(folder).name)
+
+    def test_latest_empty(self):
+        with tempfile.TemporaryDirectory() as folder:
+            self.assertIsNone(Checkpoint.latest(folder))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Test module for fitness scoring and selection.
+"""
+import random
+import unittest
+
+import numpy as np
+
+from fitness import Fitness
+from imagecrosser import ImageCrosser
+
+
+def _population():
+    flat = np.full((8, 8, 3), 200, dtype=np.uint8)
+    checks = np.zeros((8, 8, 3), dtype=np.uint8)
+    checks[(np.indices((8, 8)).sum(axis=0) % 2).astype(bool)] = 255
+    noise = np.random.default_rng(21).integers(0, 256, (8, 8, 3), dtype=np.uint8)
+    return np.stack([flat, checks, noise])
+
+
+class TestScorers(unittest.TestCase):
+    def test_colourHistograms(self):
+        histograms = Fitness.colourHistograms(_population(), bins=4)
+        self.assertEqual((3, 64), histograms.shape)
+        self.assertTrue(np.allclose(1, histograms.sum(axis=1)))
+        self.assertEqual(1, histograms[0, 63])
+        self.assertEqual(0.5, histograms[1, 0])
+
+    def test_histogramScorer(self):
+        population = _population()
+        scores = Fitness.histogramScorer(population[1])(population)
+        self.assertEqual(1, scores[1])
+        self.assertEqual(0, scores[0])
+
+    def test_edgeDensity(self):
+        scores = Fitness.edgeDensity(_population())
+        self.assertEqual(0, scores[0])
+        self.assertEqual(1, scores[1])
+
+    def test_entropy(self):
+        scores = Fitness.entropy(_population())
+        self.assertEqual(0, scores[0])
+        self.assertAlmostEqual(1 / 9, scores[1])
+        self.assertGreater(scores[2], scores[1])
+
+    def test_score(self):
+        population = _population()
+        expected = (Fitness.entropy(population) + 3 * Fitness.edgeDensity(population)) / 4
+        self.assertTrue(np.allclose(expected, Fitness.score(population, weights=[1, 3])))
+
+
+class TestSelection(unittest.TestCase):
+    scores = [0.1, 0.9, 0, 0.4]
+
+    def test_tournamentSelect(self):
+        self.assertEqual(1, Fitness.tournamentSelect(self.scores, tournamentSize=4))
+        self.assertEqual(3, Fitness.tournamentSelect(self.scores, exclude=[1], tournamentSize=4))
+
+    def test_proportionalSelect(self):
+        random.seed(21)
+        picks = [Fitness.proportionalSelect(self.scores, exclude=[1, 3]) for i in range(20)]
+        self.assertEqual({0}, set(picks))
+
+    def test_selectSets(self):
+        random.seed(21)
+        sets = Fitness.selectSets(self.scores, 5, setsize=3)
+        self.assertEqual(5, len(sets))
+        self.assertTrue(all(len(set(members)) == 3 for members in sets))
+
+
+class TestProxy(unittest.TestCase):
+    def test_downsample(self):
+        population = np.arange(2 * 5 * 6 * 3, dtype=np.uint8).reshape(2, 5, 6, 3)
+        thumbnails = Fitness.downsample(population, 2)
+        self.assertEqual((2, 2, 3, 3), thumbnails.shape)
+        self.assertEqual(population[1, 2:4, 4:6, 1].mean(), thumbnails[1, 1, 2, 1])
+
+    def test_ThumbnailCache_cross(self):
+        rng = np.random.default_rng(22)
+        population = rng.integers(0, 256, (2, 16, 24, 3), dtype=np.uint8)
+        mask = np.zeros((16, 24), dtype=bool)
+        mask[4:12, 8:20] = True
+        children = ImageCrosser.crossMaskedArrays(population, mask)
+        cache = Fitness.ThumbnailCache(population, factor=4)
+        cache.cross((0, 1), (1, 0), mask)
+        cache.swap()
+        self.assertTrue(np.allclose(Fitness.downsample(np.stack(children[::-1]), 4), cache.current, atol=1e-3))
+
+    def test_proxyScore(self):
+        population = _population()
+        thumbnails = Fitness.downsample(population, 2).astype(np.uint8)
+        scores = Fitness.proxyScore(population, thumbnails, Fitness.edgeDensity, topK=1)
+        self.assertEqual(Fitness.edgeDensity(population)[2], scores[2])
+        self.assertTrue((scores[:2] <= scores[2]).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
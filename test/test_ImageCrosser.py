@@ -0,0 +1,100 @@
+"""
+Test module for crossbreeding Pillow Images.
+"""
+import random
+import unittest
+
+from PIL import Image
+import numpy as np
+
+from imagecrosser import ImageCrosser
+
+
+def _pair(dims=(13, 7)):
+    xmax, ymax = dims
+    values = np.arange(xmax * ymax * 3).reshape(ymax, xmax, 3) % 251
+    return [Image.fromarray(values.astype(np.uint8)), Image.fromarray((255 - values).astype(np.uint8))]
+
+
+class TestTranscription(unittest.TestCase):
+    def test__swapSegments(self):
+        images = _pair()
+        crossed = ImageCrosser._swapSegments(images, [5, 20, 40, 91])
+        flats = [np.asarray(img).reshape(-1, 3) for img in images]
+        crossedFlats = [np.asarray(img).reshape(-1, 3) for img in crossed]
+        swapped = np.zeros(91, dtype=bool)
+        swapped[5:20] = swapped[40:91] = True
+        self.assertTrue((crossedFlats[0][swapped] == flats[1][swapped]).all())
+        self.assertTrue((crossedFlats[1][swapped] == flats[0][swapped]).all())
+        self.assertTrue((crossedFlats[0][~swapped] == flats[0][~swapped]).all())
+        self.assertTrue((crossedFlats[1][~swapped] == flats[1][~swapped]).all())
+
+    def test__swapSegments_acrossRows(self):
+        images = _pair()
+        crossed = ImageCrosser._swapSegments(images, [10, 15])  # Row 0 column 10 to row 1 column 1
+        self.assertEqual(images[1].getpixel((12, 0)), crossed[0].getpixel((12, 0)))
+        self.assertEqual(images[1].getpixel((1, 1)), crossed[0].getpixel((1, 1)))
+        self.assertEqual(images[0].getpixel((2, 1)), crossed[0].getpixel((2, 1)))
+
+    def test_mutationTranscription_conserves(self):
+        images = _pair()
+        for flat in [True, False]:
+            crossed = ImageCrosser.mutationTranscription(images, crosses=3, flat=flat)
+            arrays = [np.asarray(img) for img in images]
+            crossedArrays = [np.asarray(img) for img in crossed]
+            self.assertTrue((crossedArrays[0].astype(int) + crossedArrays[1] == 255).all())
+            self.assertTrue(((crossedArrays[0] == arrays[0]) | (crossedArrays[0] == arrays[1])).all())
+
+
+class TestSeeded(unittest.TestCase):
+    def test_crossWholeArea_rng(self):
+        images = _pair((40, 30))
+        crossed = [ImageCrosser.crossWholeArea(images, mutations=[ImageCrosser.mutationTranscription],
+                                               rng=random.Random(25)) for i in range(2)]
+        self.assertEqual([img.tobytes() for img in crossed[0]], [img.tobytes() for img in crossed[1]])
+
+    def test_crossWholeArea_mutationWithoutRng(self):
+        images = _pair((40, 30))
+        crossed = ImageCrosser.crossWholeArea(images, mutations=[lambda regions: regions[::-1]], rng=random.Random(25))
+        self.assertEqual([img.tobytes() for img in images[::-1]], [img.tobytes() for img in crossed])
+
+    def test_tessellatedMask_rng(self):
+        images = _pair((40, 30))
+        masks = [ImageCrosser.tessellatedMask(images, (5, 5), rng=random.Random(25)) for i in range(2)]
+        self.assertTrue((masks[0] == masks[1]).all())
+
+
+class TestMaskedCrossover(unittest.TestCase):
+    def test_areasMask(self):
+        images = _pair()
+        mask = ImageCrosser.areasMask(images, [(0, 0, 2, 3), (10, 5, 13, 7)])
+        self.assertEqual((7, 13), mask.shape)
+        self.assertEqual(6 + 6, mask.sum())
+        self.assertTrue(mask[2, 1] and mask[6, 12])
+
+    def test_crossMasked(self):
+        images = _pair()
+        mask = ImageCrosser.polygonMask(images, [(0, 0), (12, 0), (0, 6)])
+        crossed = ImageCrosser.crossMasked(images, mask)
+        arrays = [np.asarray(img) for img in images]
+        self.assertTrue((np.asarray(crossed[0])[mask] == arrays[1][mask]).all())
+        self.assertTrue((np.asarray(crossed[0])[~mask] == arrays[0][~mask]).all())
+        self.assertTrue((np.asarray(crossed[1])[mask] == arrays[0][mask]).all())
+
+    def test_crossMaskedArrays_out(self):
+        images = _pair()
+        arrays = [np.asarray(img) for img in images]
+        out = [np.zeros_like(a) for a in arrays]
+        mask = ImageCrosser.areasMask(images, [])
+        crossed = ImageCrosser.crossMaskedArrays(arrays, mask, out=out)
+        self.assertIs(out[0], crossed[0])
+        self.assertTrue((out[1] == arrays[1]).all())
+
+    def test_crossTesselated_differentSizes(self):
+        images = [_pair((13, 7))[0], _pair((9, 11))[1]]
+        crossed = ImageCrosser.crossTesselated(images, counts=(2, 2))
+        self.assertEqual([(13, 7), (9, 11)], [img.size for img in crossed])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Test module for the background ImageWriter.
+"""
+import os
+import tempfile
+import threading
+import unittest
+
+from PIL import Image
+
+from bitmap import bitmap
+from imagewriter import ImageWriter
+
+
+class TestImageWriter(unittest.TestCase):
+    def test_writes(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with ImageWriter.ImageWriter() as writer:
+                writer.save(Image.new("RGB", (9, 5), (1, 2, 3)), os.path.join(folder, "a.png"))
+                writer.writeBMP(bitmap.Bitmap.checkerboard((9, 5), 2), os.path.join(folder, "b"))
+            self.assertEqual((1, 2, 3), Image.open(os.path.join(folder, "a.png")).getpixel((4, 2)))
+            self.assertEqual((9, 5), bitmap.Bitmap.fromFile(os.path.join(folder, "b.bmp")).dims)
+
+    def test_submit_blocksWhenFull(self):
+        release = threading.Event()
+        writer = ImageWriter.ImageWriter(workers=1, maxPending=1)
+        writer.submit(release.wait)
+        blocked = threading.Thread(target=writer.submit, args=(int,))
+        blocked.start()
+        blocked.join(0.1)
+        self.assertTrue(blocked.is_alive())
+        release.set()
+        blocked.join(5)
+        self.assertFalse(blocked.is_alive())
+        writer.close()
+
+    def test_flush_raises(self):
+        writer = ImageWriter.ImageWriter()
+        writer.submit(int, "not a number")
+        self.assertRaises(ValueError, writer.flush)
+        writer.close()
+
+    def test_exit_keepsBodyException(self):
+        with self.assertRaises(KeyError):
+            with ImageWriter.ImageWriter() as writer:
+                writer.submit(int, "not a number")
+                raise KeyError("body")
+
+
+if __name__ == '__main__':
+    unittest.main()
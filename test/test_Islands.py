@@ -0,0 +1,53 @@
+"""
+Test module for the island model engine.
+"""
+import random
+import unittest
+
+import numpy as np
+
+from islands import Islands
+
+
+def brightness(population):
+    return population.mean(axis=(1, 2, 3)) / 255
+
+
+def _gen0(count, dims=(24, 16)):
+    return [np.full((dims[1], dims[0], 3), 10 * i, dtype=np.uint8) for i in range(count)]
+
+
+class TestTopologies(unittest.TestCase):
+    def test_ringTopology(self):
+        self.assertEqual([[3], [0], [1], [2]], [Islands.ringTopology(i, 4) for i in range(4)])
+
+    def test_completeTopology(self):
+        self.assertEqual([0, 1, 3], Islands.completeTopology(2, 4))
+
+
+class TestIslandModel(unittest.TestCase):
+    def test_migration(self):
+        with Islands.IslandModel(3, (24, 16), islandSize=4, migrationInterval=0, fitness=brightness,
+                                 processes=1, gen0=_gen0(12)) as model:
+            list(model.evolve(1))
+            self.assertEqual(110, model.islands[0].current[0, 0, 0, 0])  # from island 2
+            self.assertEqual(30, model.islands[1].current[0, 0, 0, 0])
+            self.assertEqual(70, model.islands[2].current[0, 0, 0, 0])
+            self.assertEqual(110, model.best()[0, 0, 0])
+
+    def _evolved(self, processes, crossName):
+        random.seed(23)
+        with Islands.IslandModel(2, (24, 16), islandSize=5, migrationInterval=2, crossName=crossName,
+                                 fitness=brightness, processes=processes, gen0=_gen0(10)) as model:
+            list(model.evolve(2))
+            return [island.current.copy() for island in model.islands]
+
+    def test_evolve_parallelMatchesSerial(self):
+        for crossName in Islands.CROSSERS:
+            serial = self._evolved(1, crossName)
+            parallel = self._evolved(2, crossName)
+            self.assertTrue(all((a == b).all() for a, b in zip(serial, parallel)), crossName)
+
+
+if __name__ == '__main__':
+    unittest.main()
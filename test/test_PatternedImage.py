@@ -1,8 +1,14 @@
 """
 Test module for patterned Image generation.
 """
+import json
+import pathlib
+import random
+import tempfile
 import unittest
 from patternedimage import PatternedImage
+from shared import shared
+from vector import vector
 
 
 class TestHelperFunctions(unittest.TestCase):
@@ -54,6 +60,15 @@ class TestHelperFunctions(unittest.TestCase):
         print("maxval = {}".format(maxval))
         self.assertTrue(maxval <= 1.0)
 
+    def test__generate2DGaussianDistributions_seeded(self):
+        dist1 = PatternedImage._generate2DGaussianDistribution((31, 29), rng=7)
+        dist2 = PatternedImage._generate2DGaussianDistribution((31, 29), rng=7)
+        self.assertTrue((dist1 == dist2).all())
+
+    def test__generate2DGaussianDistributions_singleTerminal(self):
+        dist = PatternedImage._generate2DGaussianDistribution((31, 29), deltaCount=20)
+        self.assertEqual(1, (dist == 1.0).sum())
+
     def test__parseColours_None(self):
         self.assertEqual([(255, 255, 255)], PatternedImage._parseColoursList(None))
 
@@ -77,5 +92,162 @@ class TestHelperFunctions(unittest.TestCase):
         self.assertEqual(l, PatternedImage._parseColoursList(l))
 
 
+class TestPatterns(unittest.TestCase):
+    def test_checkerboard_size(self):
+        img = PatternedImage.checkerboard((37, 23), colours=[(1, 2, 3), (200, 100, 50)], checksize=5)
+        self.assertEqual((37, 23), img.size)
+        self.assertEqual("RGB", img.mode)
+
+    def test_checkerboard_checks(self):
+        cols = [(1, 2, 3), (200, 100, 50)]
+        checksize = 5
+        img = PatternedImage.checkerboard((37, 23), colours=cols, checksize=checksize)
+        for y in range(23):
+            for x in range(37):
+                if ((x % (2 * checksize)) >= checksize) ^ ((y % (2 * checksize)) >= checksize):
+                    self.assertEqual(cols[0], img.getpixel((x, y)))
+                else:
+                    self.assertEqual(cols[1], img.getpixel((x, y)))
+
+    def test_diamonds_matchesPerPixel(self):
+        dims = (40, 30)
+        cols = [(1, 2, 3), (200, 100, 250)]
+        angles = (10, 70)
+        sizeH, sizeV = 6, 9
+        img = PatternedImage.diamonds(dims, colours=cols, angles=angles, sizes=(sizeH, sizeV))
+        vUnitH, vUnitV = shared._diamondVectors(angles)
+        vOrigin = vector.Vector(vector.radialIntersection(dims, vUnitH.phaseAngle()))
+        for y in range(0, dims[1], 3):
+            for x in range(dims[0]):
+                vPosition = vector.Vector2D([x, y]) - vOrigin
+                throughH = vector.dotProduct(vPosition, vUnitH) % (2 * sizeH)
+                throughV = vector.dotProduct(vPosition, vUnitV) % (2 * sizeV)
+                if (throughH < sizeH) ^ (throughV >= sizeV):
+                    baseColour, mixColour = cols
+                else:
+                    mixColour, baseColour = cols
+                mixRateH = [1]
+                if throughH < 1:
+                    mixRateH = [1 - throughH, throughH]
+                elif sizeH < throughH < sizeH + 1:
+                    mixRateH = [1 - (throughH - sizeH), throughH - sizeH]
+                mixRateV = [1]
+                if throughV < 1:
+                    mixRateV = [1 - throughV, throughV]
+                elif sizeV < throughV < sizeV + 1:
+                    mixRateV = [1 - (throughV - sizeV), throughV - sizeV]
+                proportions = [pH * pV for pH in mixRateH for pV in mixRateV]
+                if len(proportions) == 1:
+                    expected = baseColour
+                elif len(proportions) == 2:
+                    expected = shared.rgbBlend(baseColour, mixColour, proportions[0])
+                else:
+                    expected = shared.rgbBlend(baseColour, mixColour, proportions[0] + proportions[3])
+                for e, c in zip(expected, img.getpixel((x, y))):
+                    self.assertLessEqual(abs(e - c), 1, (x, y))
+
+    def test_gradient_matchesPerPixel(self):
+        dims = (30, 20)
+        cols = [(1, 2, 3), (200, 100, 250)]
+        angle = 17
+        img = PatternedImage.gradient(dims, colours=cols, angle=angle)
+        vUnit = vector.Vector2D.unit(angle)
+        vOrigin = vector.Vector(vector.radialIntersection(dims, angle - 180))
+        vTerminus = vector.Vector(vector.radialIntersection(dims, angle))
+        distanceTotal = (vTerminus - vOrigin).magnitude()
+        for y in range(dims[1]):
+            for x in range(dims[0]):
+                distance = vector.dotProduct(vector.Vector2D([x, y]) - vOrigin, vUnit)
+                self.assertEqual(shared.rgbBlend(*cols, distance / distanceTotal), img.getpixel((x, y)))
+
+    def test_striped_matchesPerPixel(self):
+        dims = (30, 20)
+        cols = [(1, 2, 3), (200, 100, 250)]
+        angle = -30
+        stripewidth = 5.5
+        img = PatternedImage.striped(dims, colours=cols, stripewidth=stripewidth, angle=angle)
+        vUnit = vector.Vector2D.unit(angle)
+        vOrigin = vector.Vector(vector.radialIntersection(dims, angle - 180))
+        for y in range(dims[1]):
+            for x in range(dims[0]):
+                through = vector.dotProduct(vector.Vector2D([x, y]) - vOrigin, vUnit) % (2 * stripewidth)
+                if through < 1:
+                    expected = shared.rgbBlend(cols[1], cols[0], through)
+                elif stripewidth - 1 < through < stripewidth:
+                    expected = shared.rgbBlend(cols[1], cols[0], stripewidth - through)
+                elif through >= stripewidth:
+                    expected = cols[1]
+                else:
+                    expected = cols[0]
+                self.assertEqual(expected, img.getpixel((x, y)))
+
+    def test_stripedMulti_coloursInOrder(self):
+        dims = (60, 10)
+        cols = [(10, 20, 30), (40, 50, 60), (70, 80, 90), (100, 110, 120), (130, 140, 150)]
+        img = PatternedImage.stripedMulti(dims, colours=cols, stripewidth=6, angle=0)
+        vOrigin = vector.radialIntersection(dims, -180)
+        for x in range(dims[0]):
+            colourIndex = int(((x - vOrigin[0]) % 30) / 6)
+            self.assertEqual(cols[colourIndex], img.getpixel((x, 5)))
+
+    def test_stripedMulti_manyColours(self):
+        cols = shared.randomRGBContrasting(7)
+        img = PatternedImage.stripedMulti((50, 40), colours=cols, stripewidth=5, angle=33)
+        self.assertTrue(set(c for n, c in img.getcolors()) <= set(cols))
+
+
+class TestSeeded(unittest.TestCase):
+    def test_new_rng(self):
+        colours = [(1, 2, 3), (200, 100, 50), (9, 90, 180)]
+        for pattern in [PatternedImage.checkerboard, PatternedImage.diamonds, PatternedImage.gradient,
+                        PatternedImage.striped, PatternedImage.stripedMulti]:
+            random.seed(1)
+            img1 = PatternedImage.new(pattern, dims=(64, 48), colours=colours, rng=random.Random(25))
+            random.seed(2)
+            img2 = PatternedImage.new(pattern, dims=(64, 48), colours=colours, rng=random.Random(25))
+            self.assertEqual(img1.tobytes(), img2.tobytes(), pattern.__name__)
+
+
+class TestGaussianStore(unittest.TestCase):
+    def test__generateGaussianDistributionFilename_npy(self):
+        filename = PatternedImage._generateGaussianDistributionFilename((540, 1080), index=3, extension="npy")
+        self.assertEqual("540x1080_3.npy", filename)
+
+    def test_convertGaussianDistributions(self):
+        dist = [[0.0, 0.25, 0.5], [0.75, 1.0, 0.01]]
+        with tempfile.TemporaryDirectory() as root:
+            folder = PatternedImage._gaussianDistributionFolder((3, 2), root=root)
+            folder.mkdir(parents=True)
+            with (folder / "3x2_0.json").open("w", encoding="UTF-8") as target:
+                json.dump(dist, target)
+
+            written = PatternedImage.convertGaussianDistributions(root)
+            self.assertEqual([folder / "3x2_0.npy"], written)
+            self.assertEqual([], PatternedImage.convertGaussianDistributions(root))
+
+            loaded = PatternedImage._loadGaussianDistribution(written[0])
+            self.assertEqual((2, 3), loaded.shape)
+            for row, loadedRow in zip(dist, loaded):
+                for value, loadedValue in zip(row, loadedRow):
+                    self.assertAlmostEqual(value, loadedValue, places=6)
+            del loaded
+
+    def test__saveGaussianDistribution_readOnly(self):
+        with tempfile.TemporaryDirectory() as root:
+            filepath = pathlib.Path(root) / "2x2_0.npy"
+            PatternedImage._saveGaussianDistribution(filepath, [[0.5, 0.25], [0.0, 1.0]])
+            loaded = PatternedImage._loadGaussianDistribution(filepath)
+            self.assertFalse(loaded.flags.writeable)
+            del loaded
+
+    def test__addGaussianDistribution_takenIndex(self):
+        with tempfile.TemporaryDirectory() as root:
+            for name in ["2x2_0.npy", "2x2_2.npy"]:  # as if another writer claimed index 2 first
+                PatternedImage._saveGaussianDistribution(pathlib.Path(root) / name, [[1.0, 1.0], [1.0, 1.0]])
+            filepath = PatternedImage._addGaussianDistribution(root, (2, 2), [[0.5, 0.5], [0.5, 0.5]])
+            self.assertEqual("2x2_3.npy", filepath.name)
+            self.assertEqual(["2x2_0.npy", "2x2_2.npy", "2x2_3.npy"],
+                             sorted(f.name for f in pathlib.Path(root).iterdir()))
+
 if __name__ == '__main__':
     unittest.main()
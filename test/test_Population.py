@@ -0,0 +1,55 @@
+"""
+Test module for the shared memory Population.
+"""
+import unittest
+
+from PIL import Image
+import numpy as np
+
+from imagecrosser import ImageCrosser
+from population import Population
+
+
+def _images(count=4, dims=(13, 7)):
+    xmax, ymax = dims
+    return [Image.fromarray(np.full((ymax, xmax, 3), 40 * i, dtype=np.uint8)) for i in range(count)]
+
+
+class TestPopulation(unittest.TestCase):
+    def test_fromImages(self):
+        with Population.Population.fromImages(_images()) as population:
+            self.assertEqual(4, len(population))
+            self.assertEqual((4, 7, 13, 3), population.current.shape)
+            self.assertEqual([0, 40, 80, 120], [int(slot[0, 0, 0]) for slot in population])
+            self.assertEqual((13, 7), population.images()[2].size)
+
+    def test_swap(self):
+        with Population.Population.fromImages(_images()) as population:
+            population.next[...] = 7
+            current, following = population.names
+            population.swap()
+            self.assertEqual((following, current), population.names)
+            self.assertTrue((population.current == 7).all())
+            self.assertEqual(80, population.next[2, 0, 0, 0])
+
+    def test_attach(self):
+        with Population.Population.fromImages(_images()) as population:
+            attached = Population.Population.attach(population.names, 4, (13, 7))
+            attached.next[1] = 99
+            self.assertTrue((attached.current == population.current).all())
+            self.assertTrue((population.next[1] == 99).all())
+            attached.close()
+
+    def test_crossIntoSlots(self):
+        with Population.Population.fromImages(_images()) as population:
+            parents = [population[0], population[3]]
+            mask = ImageCrosser.subRegionMask(parents)
+            ImageCrosser.crossMaskedArrays(parents, mask, out=population.next[:2])
+            self.assertTrue((population.next[0][mask] == 120).all())
+            self.assertTrue((population.next[0][~mask] == 0).all())
+            self.assertTrue((population.next[1][mask] == 0).all())
+            del parents
+
+
+if __name__ == '__main__':
+    unittest.main()
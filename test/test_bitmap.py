@@ -1,6 +1,11 @@
 import shared.shared
 from bitmap import bitmap
+from PIL import Image
+import numpy as np
+import os
+import tempfile
 import unittest
+from unittest import mock
 
 dir = r"testimages\\"
 
@@ -93,6 +98,172 @@ class TestBitmapCreation(unittest.TestCase):
                 print("Successful resolution = {}".format(res))
 
 
+class TestBitmapBuffer(unittest.TestCase):
+    def test_array_shape(self):
+        bmp = bitmap.Bitmap.checkerboard((16, 8), checksize=4)
+        self.assertEqual((8, 16, 3), bmp.array.shape)
+        self.assertEqual(np.uint8, bmp.array.dtype)
+
+    def test_pixels_view(self):
+        bmp = bitmap.Bitmap.blank((4, 3), colour=(1, 2, 3))
+        self.assertEqual((1, 2, 3), bmp.pixels[2][3].rgb)
+        bmp.pixels[2][3].rgb = (7, 8, 9)
+        self.assertEqual([7, 8, 9], bmp.array[2, 3].tolist())
+
+    def test_pixels_rowSlice(self):
+        bmp = bitmap.Bitmap.blank((4, 3), colour=(1, 2, 3))
+        row = bmp.pixels[1][:2]
+        self.assertEqual(2, len(row))
+        self.assertEqual([(1, 2, 3)] * 2, [p.rgb for p in row])
+
+    def test_init_pixelList(self):
+        pixels = [[bitmap.Pixel((i, j, 0)) for i in range(4)] for j in range(3)]
+        bmp = bitmap.Bitmap((4, 3), pixels)
+        self.assertEqual([3, 2, 0], bmp.array[2, 3].tolist())
+
+    def test_encodePixels_matchesPixelBytes(self):
+        rng = np.random.default_rng(1)
+        for dims in [(5, 3), (7, 9), (16, 4)]:
+            bmp = bitmap.Bitmap(dims, rng.integers(0, 256, (dims[1], dims[0], 3), dtype=np.uint8))
+            for res in [16, 24]:
+                lineBytes = (dims[0] * res) // 8
+                padding = bytes(-lineBytes % 4)
+                expected = b''.join(b''.join(p.to_bytes(res // 8, 'little') for p in line) + padding
+                                    for line in bmp.pixels)
+                self.assertEqual(expected, bmp.encodePixels(res), (dims, res))
+
+    def test_fromFile_roundTrip(self):
+        rng = np.random.default_rng(2)
+        bmp = bitmap.Bitmap((7, 5), rng.integers(0, 256, (5, 7, 3), dtype=np.uint8))
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "roundtrip")
+            for res in [16, 24]:
+                bmp.writeBMP(filename, res=res)
+                loaded = bitmap.Bitmap.fromFile(filename)
+                self.assertEqual((7, 5), loaded.dims)
+                expected = bmp.array if res == 24 else (bmp.array >> 3) << 3
+                self.assertTrue((expected == loaded.array).all(), res)
+                del loaded
+
+    def test_fromFile_readOnlyView(self):
+        bmp = bitmap.Bitmap.checkerboard((6, 4), checksize=2)
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "view")
+            bmp.writeBMP(filename)
+            loaded = bitmap.Bitmap.fromFile(filename + ".bmp")
+            self.assertFalse(loaded.array.flags.writeable)
+            self.assertFalse(loaded.array.flags.owndata)
+            del loaded
+
+    def test_fromFile_bottomUp(self):
+        rng = np.random.default_rng(4)
+        array = rng.integers(0, 256, (5, 7, 3), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "pillow.bmp")
+            Image.fromarray(array).save(filename)  # Pillow writes bottom-up BMPs
+            loaded = bitmap.Bitmap.fromFile(filename, bottomUp=True)
+            self.assertTrue((array == loaded.array).all())
+            del loaded
+
+    def test_fromFile_invalid(self):
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "invalid.bmp")
+            with open(filename, 'wb') as target:
+                target.write(bytes(60))
+            with self.assertRaises(ValueError):
+                bitmap.Bitmap.fromFile(filename)
+
+    def test__patternGaussian_stoppingSemantics(self):
+        dims = (3, 2)
+        rng = np.random.default_rng(3)
+        draws = []
+
+        def fixedCoordinates(generator, count, mus, sigmas, dims):
+            indices = rng.integers(0, 6, count)
+            inside = rng.random(count) < 0.8
+            draws.append((indices, inside))
+            return indices, inside
+
+        with mock.patch.object(bitmap.shared, "_gaussianCoordinates", fixedCoordinates):
+            pixels = bitmap._patternGaussian(dims, colour=(0, 40, 0), delta=100, terminal=255)
+
+        expected = [[0, 40, 0] for i in range(6)]
+        sequence = [(index, isInside) for indices, inside in draws for index, isInside in zip(indices, inside)]
+        terminalReached = False
+        colourIndex = 0
+        for index, isInside in sequence:
+            if isInside:
+                expected[index][colourIndex] = shared.shared.clipValue(expected[index][colourIndex] + 100)
+                if expected[index][colourIndex] >= 255:
+                    terminalReached = True
+            colourIndex = (colourIndex + 1) % 3
+            if terminalReached and not colourIndex:
+                break
+        self.assertEqual(expected, pixels.reshape(6, 3).tolist())
+
+    def test__patternDiamonds2_xorOfStripes(self):
+        dims = (37, 29)
+        colour1, colour2 = (1, 2, 3), (200, 9, 9)
+        pixels = bitmap._patternDiamonds2(dims, angles=(10, 80), sizes=(6, 8), colour1=colour1, colour2=colour2)
+        stripes = [bitmap._patternStripe(dims, stripewidth=6, angle=10, colour1=(0, 0, 0), colour2=(255, 255, 255)),
+                   bitmap._patternStripe(dims, stripewidth=8, angle=80, colour1=(0, 0, 0), colour2=(255, 255, 255))]
+        densities = [s[:, :, 0].astype(int) for s in stripes]
+        for y in range(dims[1]):
+            for x in range(dims[0]):
+                expected = bitmap._rgbBlend(colour1, colour2, abs(densities[0][y, x] - densities[1][y, x]) / 255)
+                for e, p in zip(expected, pixels[y, x]):
+                    self.assertLessEqual(abs(e - int(p)), 1)
+
+    def test_init_invalidPixels(self):
+        with self.assertRaises(ValueError):
+            bitmap.Bitmap((2, 2), [[1, 2], [3, 4]])
+
+
+class TestGaussianStore(unittest.TestCase):
+    def setUp(self):
+        bitmap.GaussianStore.gaussians.clear()
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        bitmap.GaussianStore.gaussians.clear()
+        self.folder.cleanup()
+
+    def test_get_cached(self):
+        gs = bitmap.GaussianStore(folder=self.folder.name)
+        self.assertIs(gs.get((12, 10), 0), gs.get((12, 10), 0))
+
+    def test_get_dims(self):
+        gs = bitmap.GaussianStore(folder=self.folder.name)
+        self.assertEqual((10, 12, 3), gs.get((12, 10), 1).array.shape)
+        self.assertEqual((8, 9, 3), gs.get((9, 8), 1).array.shape)
+
+    def test_get_persisted(self):
+        first = bitmap.GaussianStore(folder=self.folder.name).get((12, 10), 0).array.copy()
+        bitmap.GaussianStore.gaussians.clear()
+        second = bitmap.GaussianStore(folder=self.folder.name).get((12, 10), 0)
+        self.assertTrue((first == second.array).all())
+        self.assertFalse(second.array.flags.writeable)
+
+    def test_get_independentOfStore(self):
+        first = bitmap.GaussianStore(folder=self.folder.name).get((12, 10), 0, rng=7).array.copy()
+        bitmap.GaussianStore.gaussians.clear()
+        with tempfile.TemporaryDirectory() as folder:
+            second = bitmap.GaussianStore(folder=folder).get((12, 10), 0, rng=7)
+            self.assertTrue((first == second.array).all())
+            bitmap.GaussianStore.gaussians.clear()
+            del second
+
+    def test_get_evicts(self):
+        gs = bitmap.GaussianStore(folder=self.folder.name, budget=12 * 10 * 3)
+        gs.get((12, 10), 0)
+        gs.get((12, 10), 1)
+        self.assertEqual(1, len(gs.gaussians))
+
+    def test_get_invalidIndex(self):
+        with self.assertRaises(ValueError):
+            bitmap.GaussianStore(folder=self.folder.name).get((12, 10), 2)
+
+
 class TestBitmap_16x16_16(unittest.TestCase):
     filename = "{}test_16x16_16".format(dir)
     bmp = bitmap.Bitmap.blank((16, 16), colour=(255, 255, 255))
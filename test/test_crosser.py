@@ -0,0 +1,106 @@
+"""
+Test module for crossbreeding Bitmaps.
+"""
+from bitmap import bitmap, crosser
+import random
+import unittest
+
+
+class TestFullImageTranscriber(unittest.TestCase):
+    parent1 = bitmap.Bitmap.checkerboard((20, 10), 3)
+    parent2 = bitmap.Bitmap.gradient((22, 12), angle=10, colour1=(1, 2, 3), colour2=(200, 100, 0))
+
+    def test_transcribe_positions(self):
+        transcriber = crosser.FullImageTranscriber(self.parent1, self.parent2, crossoverPositions=[5, 77])
+        offspring1, offspring2 = transcriber.transcribe()
+        flat1 = self.parent1.array[:10, :20].reshape(-1, 3)
+        flat2 = self.parent2.array[:10, :20].reshape(-1, 3)
+        self.assertEqual((20, 10), offspring1.dims)
+        self.assertTrue((offspring1.array.reshape(-1, 3)[:5] == flat2[:5]).all())
+        self.assertTrue((offspring1.array.reshape(-1, 3)[5:77] == flat1[5:77]).all())
+        self.assertTrue((offspring1.array.reshape(-1, 3)[77:] == flat2[77:]).all())
+        self.assertTrue((offspring2.array.reshape(-1, 3)[77:] == flat1[77:]).all())
+
+    def test_transcribe_parentsUnchanged(self):
+        before = self.parent1.array.copy()
+        crosser.FullImageTranscriber.multiple(self.parent1, self.parent2, crossoverChance=0.05).transcribe()
+        self.assertTrue((before == self.parent1.array).all())
+
+    def test_constructors(self):
+        for transcriber in [crosser.FullImageTranscriber.single(self.parent1, self.parent2),
+                            crosser.FullImageTranscriber.double(self.parent1, self.parent2),
+                            crosser.FullImageTranscriber.multiple(self.parent1, self.parent2)]:
+            offspring = transcriber.transcribe()
+            self.assertEqual([(10, 20, 3), (10, 20, 3)], [bmp.array.shape for bmp in offspring])
+
+
+class TestBreedSelected(unittest.TestCase):
+    generation = [bitmap.Bitmap.blank((12, 8), (i, i, i)) for i in range(6)]
+
+    def test__breedTournament(self):
+        random.seed(21)
+        pairs = list(crosser._breedTournament(self.generation, setcount=4, tournamentSize=6,
+                                              fitness=lambda population: population[:, 0, 0, 0]))
+        self.assertEqual(4, len(pairs))
+        self.assertTrue(all(pair == (self.generation[5], self.generation[4]) for pair in pairs))
+
+    def test__breedFitnessProportional(self):
+        random.seed(21)
+        pairs = list(crosser._breedFitnessProportional(self.generation))
+        self.assertEqual(3, len(pairs))
+        self.assertTrue(all(pair[0] is not pair[1] for pair in pairs))
+
+
+class TestCrosserMonogamous(unittest.TestCase):
+    def _generations(self, processes, count=3):
+        random.seed(18)
+        breeder = crosser.CrosserMonogamous(dims=(48, 40), genSize=6, breedPatternParams={"setcount": 3},
+                                            processes=processes)
+        generations = []
+        for generation in breeder:
+            generations.append([bmp.array.copy() for bmp in generation])
+            if len(generations) == count:
+                break
+        return generations
+
+    def test_fromCheckpointArrays(self):
+        for stop in [0, 1]:
+            random.seed(24)
+            breeder = crosser.CrosserMonogamous(dims=(48, 40), genSize=6, breedPatternParams={"setcount": 3})
+            expected = []
+            for genID, generation in enumerate(breeder):
+                if genID == stop:
+                    arrays = breeder.checkpointArrays(generation)
+                    state = random.getstate()
+                elif genID > stop:
+                    expected.append([bmp.array.copy() for bmp in generation])
+                    if len(expected) == 2:
+                        break
+
+            random.setstate(state)
+            resumed = crosser.CrosserMonogamous.fromCheckpointArrays(arrays, breedPatternParams={"setcount": 3})
+            for generation, arraysExpected in zip(resumed, expected):
+                self.assertEqual(len(arraysExpected), len(generation))
+                self.assertTrue(all((bmp.array == a).all() for bmp, a in zip(generation, arraysExpected)))
+
+    def test_iter_rng(self):
+        runs = []
+        for seed in [1, 2]:
+            random.seed(seed)  # the random module must not matter
+            breeder = crosser.CrosserMonogamous(dims=(48, 40), genSize=6, breedPatternParams={"setcount": 3},
+                                                rng=random.Random(25))
+            runs.append([[bmp.array.copy() for bmp in gen] for gen, i in zip(breeder, range(3))])
+        for genA, genB in zip(*runs):
+            self.assertTrue(all((a == b).all() for a, b in zip(genA, genB)))
+
+    def test_iter_parallelMatchesSerial(self):
+        serial = self._generations(None)
+        parallel = self._generations(2)
+        self.assertEqual([len(gen) for gen in serial], [len(gen) for gen in parallel])
+        for genSerial, genParallel in zip(serial, parallel):
+            for a, b in zip(genSerial, genParallel):
+                self.assertTrue((a == b).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
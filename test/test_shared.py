@@ -1,4 +1,7 @@
 from shared import shared
+from vector import vector
+import numpy as np
+import random
 import unittest
 
 
@@ -30,5 +33,86 @@ class MyTestCase(unittest.TestCase):
             reoriented = shared.reorient(vs, orientation=i)
             self.assertEqual(5, reoriented[1][1])
 
+    def test_rgbBlendArray_matchesRgbBlend(self):
+        c1 = (8, 16, 32)
+        c2 = (255, 128, 64)
+        proportions = np.linspace(-0.5, 1.5, 41).reshape(1, 41)
+        blended = shared.rgbBlendArray(c1, c2, proportions)
+        for i, p in enumerate(proportions[0]):
+            self.assertEqual(shared.rgbBlend(c1, c2, p), tuple(blended[0, i]))
+
+    def test_distanceAlong_matchesDotProduct(self):
+        vUnit = vector.Vector2D.unit(35)
+        vOrigin = (3, 7)
+        distances = shared.distanceAlong((9, 11), vOrigin, vUnit)
+        self.assertEqual((11, 9), distances.shape)
+        for y in range(11):
+            for x in range(9):
+                self.assertAlmostEqual(vector.dotProduct((x - 3, y - 7), vUnit), distances[y, x])
+
+    def test__firstThresholdCrossing(self):
+        counts = np.array([0, 2, 0])
+        keys = np.array([0, 1, 2, 0, 2, 1, 0])
+        self.assertEqual(5, shared._firstThresholdCrossing(counts, keys, 4))  # key 1 reaches 4 on its second draw
+        self.assertEqual(1, shared._firstThresholdCrossing(counts, keys, 3))
+        self.assertEqual(3, shared._firstThresholdCrossing(np.zeros(3, dtype=int), keys, 2))
+        self.assertIsNone(shared._firstThresholdCrossing(counts, keys, 5))
+
+    def test__firstThresholdCrossing_perKey(self):
+        counts = np.array([0, 0, 0])
+        keys = np.array([0, 1, 2, 0, 2, 1, 0])
+        self.assertEqual(4, shared._firstThresholdCrossing(counts, keys, np.array([3, 3, 2])))
+
+    def test_reorientArray_matchesReorient(self):
+        vs = [[1, 2, 3], [4, 5, 6], [7, 8, 9]]
+        for i in range(8):
+            self.assertEqual(shared.reorient(vs, orientation=i), shared.reorientArray(np.array(vs), i).tolist())
+
+    def test_reorientArray_view(self):
+        vs = np.arange(12).reshape(3, 4)
+        for i in range(8):
+            self.assertTrue(np.shares_memory(vs, shared.reorientArray(vs, i)))
+
+    def test_randomCrossoverPositions_bounds(self):
+        for i in range(100):
+            positions = shared.randomCrossoverPositions(500, 0.01)
+            self.assertEqual(sorted(set(positions)), positions)
+            self.assertTrue(all(0 <= p < 500 for p in positions))
+
+    def test_randomCrossoverPositions_certainties(self):
+        self.assertEqual([], shared.randomCrossoverPositions(500, 0))
+        self.assertEqual(list(range(7)), shared.randomCrossoverPositions(7, 1))
+
+    def test_randomCrossoverPositions_mean(self):
+        counts = [len(shared.randomCrossoverPositions(1000, 0.004)) for i in range(5000)]
+        self.assertAlmostEqual(4.0, sum(counts) / len(counts), delta=0.2)
+
+    def test_pythonRandom(self):
+        rng = random.Random(25)
+        self.assertIs(random, shared.pythonRandom())
+        self.assertIs(rng, shared.pythonRandom(rng))
+        self.assertEqual(random.Random(25).random(), shared.pythonRandom(25).random())
+        self.assertEqual(shared.pythonRandom(np.random.default_rng(25)).random(),
+                         shared.pythonRandom(np.random.default_rng(25)).random())
+
+    def test_numpyRandom_followsRandomModule(self):
+        generator = np.random.default_rng(25)
+        self.assertIs(generator, shared.numpyRandom(generator))
+        random.seed(25)
+        first = shared.numpyRandom().random(3)
+        random.seed(25)
+        self.assertTrue((first == shared.numpyRandom().random(3)).all())
+        self.assertTrue((first == shared.numpyRandom(random.Random(25)).random(3)).all())
+
+    def test_spawnRandom(self):
+        streams = shared.spawnRandom(random.Random(25), 3)
+        again = shared.spawnRandom(random.Random(25), 3)
+        self.assertEqual([s.random() for s in again], [s.random() for s in streams])
+        self.assertEqual(3, len({s.random() for s in streams}))
+        generators = shared.spawnRandom(np.random.default_rng(25), 2)
+        self.assertTrue(all(isinstance(g, np.random.Generator) for g in generators))
+        self.assertNotEqual(generators[0].random(), generators[1].random())
+
+
 if __name__ == '__main__':
     unittest.main()